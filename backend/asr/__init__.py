@@ -1,6 +1,6 @@
 """
 ASR模块
 """
-from .client import ASRClient, ASRSession
+from .client import ASRClient, ASRConnectionPool, ASRSession, AudioSendBuffer, asr_pool
 
-__all__ = ['ASRClient', 'ASRSession']
+__all__ = ['ASRClient', 'ASRConnectionPool', 'ASRSession', 'AudioSendBuffer', 'asr_pool']
@@ -3,22 +3,116 @@ ASR WebSocket客户端
 用于与FunASR C++服务器通信
 """
 import asyncio
-import json
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 
+import orjson
 import websockets
 
 from ..config import config
 
 
+class AudioSendBuffer:
+    """音频写合并缓冲：小块音频累积到阈值或超时后合并为一帧发送
+
+    文本控制帧通过 send_text 发送，发送前先冲刷已缓冲的音频以保证顺序。
+    """
+
+    def __init__(self, send: Callable[[Any], Awaitable[None]],
+                 max_bytes: int = 16384, max_delay: float = 0.02):
+        self._send = send
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self._buf = bytearray()
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._error: Optional[BaseException] = None
+
+    async def write(self, data: bytes) -> None:
+        """写入音频数据"""
+        if self._error is not None:
+            raise self._error
+
+        self._buf.extend(data)
+        if len(self._buf) >= self.max_bytes:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        if not self._buf:
+            return
+        if self._flush_task is not None:
+            # 上一次定时冲刷仍在发送，稍后重试
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self._on_timer)
+            return
+        self._flush_task = asyncio.ensure_future(self._timed_flush())
+
+    async def _timed_flush(self) -> None:
+        try:
+            async with self._lock:
+                await self._flush_locked()
+        except Exception as exc:
+            # 定时冲刷失败时在下一次写入时抛出
+            self._error = exc
+        finally:
+            if self._flush_task is asyncio.current_task():
+                self._flush_task = None
+
+    async def flush(self) -> None:
+        """立即发送缓冲中的音频"""
+        # 先等待进行中的定时冲刷，避免其在调用方之后继续运行
+        task = self._flush_task
+        if task is not None:
+            await asyncio.shield(task)
+        async with self._lock:
+            await self._flush_locked()
+
+    async def _flush_locked(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buf:
+            return
+        data = bytes(self._buf)
+        self._buf.clear()
+        await self._send(data)
+
+    async def send_text(self, text: str) -> None:
+        """先冲刷音频再发送文本控制帧"""
+        async with self._lock:
+            await self._flush_locked()
+            await self._send(text)
+
+    def close(self) -> None:
+        """丢弃未发送数据并取消定时器"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        self._buf.clear()
+
+
 class ASRClient:
     """ASR WebSocket客户端 - 增强版（带重连机制和线程安全）"""
 
+    # 固定控制帧：停止说话信号不随会话变化，直接复用
+    _STOP_FRAME = '{"is_speaking": false}'
+    # 配置帧模板，只替换会话相关字段；字符串字段需经 JSON 转义后填入
+    _CONFIG_FRAME_TEMPLATE = (
+        '{{"chunk_size": [5, 10, 5], "wav_name": {wav_name}, "is_speaking": {is_speaking}, '
+        '"chunk_interval": 10, "mode": {mode}, "itn": true}}'
+    )
+
     def __init__(self, host: str = None, port: int = None):
         self.host = host or config.asr.get('host', 'localhost')
         self.port = port or config.asr.get('port', 10095)
         self.uri = f"ws://{self.host}:{self.port}"
         self.websocket = None
+        self._send_buffer: Optional[AudioSendBuffer] = None
         self._connected = False
         self._connect_lock = asyncio.Lock()
         self._reconnect_attempts = 0
@@ -42,6 +136,7 @@ class ASRClient:
                     ),
                     timeout=10.0  # 10秒连接超时
                 )
+                self._send_buffer = AudioSendBuffer(self.websocket.send)
                 self._connected = True
                 self._reconnect_attempts = 0
                 return True
@@ -76,19 +171,24 @@ class ASRClient:
             await self.send_config(mode, wav_name, hotwords)
             print("Reconnected successfully")
 
-    def disconnect(self) -> None:
+    async def disconnect(self) -> None:
         """断开连接"""
         if self._reconnect_timer:
             self._reconnect_timer.cancel()
             self._reconnect_timer = None
 
-        if self.websocket:
+        if self._send_buffer:
+            self._send_buffer.close()
+            self._send_buffer = None
+
+        websocket = self.websocket
+        self.websocket = None
+        self._connected = False
+        if websocket:
             try:
-                asyncio.create_task(self.websocket.close())
+                await websocket.close()
             except Exception:
                 pass
-            self.websocket = None
-        self._connected = False
 
     async def send_config(self, mode: str = "2pass", wav_name: str = "meeting",
                           hotwords: Optional[Dict[str, int]] = None,
@@ -97,36 +197,41 @@ class ASRClient:
         if not self.websocket:
             raise Exception("Not connected to ASR server")
 
-        request = {
-            "chunk_size": [5, 10, 5],
-            "wav_name": wav_name,
-            "is_speaking": is_speaking,
-            "chunk_interval": 10,
-            "mode": mode,
-            "itn": True
-        }
-
         if hotwords:
-            request["hotwords"] = hotwords
+            # 带热词时才完整序列化
+            request = {
+                "chunk_size": [5, 10, 5],
+                "wav_name": wav_name,
+                "is_speaking": is_speaking,
+                "chunk_interval": 10,
+                "mode": mode,
+                "itn": True,
+                "hotwords": hotwords
+            }
+            # 控制帧必须以文本帧发送，二进制帧会被服务端当作音频
+            frame = orjson.dumps(request).decode()
+        else:
+            frame = self._CONFIG_FRAME_TEMPLATE.format(
+                wav_name=orjson.dumps(wav_name).decode(),
+                is_speaking="true" if is_speaking else "false",
+                mode=orjson.dumps(mode).decode()
+            )
 
-        await self.websocket.send(json.dumps(request))
+        await self._send_buffer.send_text(frame)
 
     async def send_audio(self, audio_data: bytes) -> None:
         """发送音频数据"""
         if not self.websocket:
             raise Exception("Not connected to ASR server")
 
-        await self.websocket.send(audio_data)
+        await self._send_buffer.write(audio_data)
 
     async def send_stop_speaking(self) -> None:
         """发送停止说话信号"""
         if not self.websocket:
             raise Exception("Not connected to ASR server")
 
-        request = {
-            "is_speaking": False
-        }
-        await self.websocket.send(json.dumps(request))
+        await self._send_buffer.send_text(self._STOP_FRAME)
 
     async def receive(self) -> Dict[str, Any]:
         """接收识别结果"""
@@ -136,18 +241,39 @@ class ASRClient:
         message = await self.websocket.recv()
 
         if isinstance(message, str):
-            return json.loads(message)
+            return orjson.loads(message)
         else:
             # 二进制消息
             return {"type": "binary", "data": message}
 
+    async def receive_raw(self) -> Union[str, bytes]:
+        """接收原始消息（不解析JSON），用于只需转发的调用方"""
+        if not self.websocket:
+            raise Exception("Not connected to ASR server")
+
+        return await self.websocket.recv()
+
+    @staticmethod
+    def is_final_frame(message: Union[str, bytes]) -> bool:
+        """不解析JSON，按字面判断是否为最终结果帧（兼容紧凑和带空格的序列化）"""
+        return isinstance(message, str) and (
+            '"is_final":true' in message or '"is_final": true' in message
+        )
+
+    async def receive_final(self) -> Dict[str, Any]:
+        """跳过中间结果，只对最终结果帧做完整解析"""
+        while True:
+            message = await self.receive_raw()
+            if self.is_final_frame(message):
+                return orjson.loads(message)
+
     async def receive_stream(self, callback: Callable[[Dict[str, Any]], None],
                               on_close: Callable = None) -> None:
         """接收流式识别结果"""
         try:
             async for message in self.websocket:
                 if isinstance(message, str):
-                    result = json.loads(message)
+                    result = orjson.loads(message)
                     callback(result)
                 else:
                     callback({"type": "binary", "data": message})
@@ -167,37 +293,135 @@ class ASRClient:
         return self._connected
 
 
+class ASRConnectionPool:
+    """ASR连接池：复用已建立的WebSocket连接，避免每个会话重新握手
+
+    FunASR 服务端按连接加载热词，因此空闲连接按 (mode, hotwords) 分组复用。
+    """
+
+    def __init__(self, max_size: int = None):
+        self.max_size = max_size or config.asr.get('pool_size', 8)
+        self._idle: Dict[Tuple, List[ASRClient]] = {}
+        self._size = 0
+        self._cond = asyncio.Condition()
+
+    @staticmethod
+    def make_key(mode: str, hotwords: Optional[Dict[str, int]] = None) -> Tuple:
+        """生成连接分组键"""
+        return (mode, tuple(sorted(hotwords.items())) if hotwords else ())
+
+    async def acquire(self, key: Tuple) -> Optional[ASRClient]:
+        """获取一个已连接的客户端，连接失败返回 None"""
+        async with self._cond:
+            while True:
+                idle = self._idle.get(key)
+                while idle:
+                    client = idle.pop()
+                    if client.is_connected:
+                        return client
+                    self._size -= 1
+
+                if self._size < self.max_size:
+                    break
+
+                # 已达上限：关闭其他分组的空闲连接腾出名额
+                evicted = await self._evict_idle()
+                if evicted:
+                    break
+
+                await self._cond.wait()
+
+            self._size += 1
+
+        client = ASRClient()
+        if await client.connect():
+            return client
+
+        async with self._cond:
+            self._size -= 1
+            self._cond.notify()
+        return None
+
+    async def _evict_idle(self) -> bool:
+        for clients in self._idle.values():
+            if clients:
+                await clients.pop().disconnect()
+                self._size -= 1
+                return True
+        return False
+
+    async def release(self, client: ASRClient, key: Tuple, reusable: bool = True) -> None:
+        """归还客户端；不可复用的连接直接关闭"""
+        async with self._cond:
+            if reusable and client.is_connected:
+                self._idle.setdefault(key, []).append(client)
+            else:
+                await client.disconnect()
+                self._size -= 1
+            self._cond.notify()
+
+
+# 全局连接池
+asr_pool = ASRConnectionPool()
+
+
 class ASRSession:
     """ASR会话管理"""
 
     def __init__(self, meeting_id: str = None):
         self.meeting_id = meeting_id or "default"
-        self.client = ASRClient()
+        self.client: Optional[ASRClient] = None
+        self._pool_key: Tuple = ()
         self.mode = "2pass"
         self.hotwords = None
-        self._text_buffer = ""
+        self._text_chunks: List[str] = []
         self._is_configured = False
+        # 后台接收任务把识别结果推入队列，发送音频时无需等待超时
+        self._results: asyncio.Queue = asyncio.Queue()
+        self._rx_task: Optional[asyncio.Task] = None
+
+    async def _rx_loop(self) -> None:
+        """持续接收ASR结果并放入队列"""
+        await self.client.receive_stream(self._results.put_nowait)
+
+    def _stop_rx(self) -> None:
+        if self._rx_task:
+            self._rx_task.cancel()
+            self._rx_task = None
 
     async def start(self, mode: str = "2pass",
                     hotwords: Optional[Dict[str, int]] = None) -> bool:
         """开始ASR会话"""
         self.mode = mode
         self.hotwords = hotwords
+        self._pool_key = asr_pool.make_key(mode, hotwords)
 
-        connected = await self.client.connect()
+        self.client = await asr_pool.acquire(self._pool_key)
+        connected = self.client is not None
         if connected:
-            await self.client.send_config(
-                mode=mode,
-                wav_name=self.meeting_id,
-                hotwords=hotwords,
-                is_speaking=True
-            )
+            try:
+                await self.client.send_config(
+                    mode=mode,
+                    wav_name=self.meeting_id,
+                    hotwords=hotwords,
+                    is_speaking=True
+                )
+            except Exception:
+                # 配置帧发送失败的连接不可复用，归还连接池释放名额
+                client, self.client = self.client, None
+                await asr_pool.release(client, self._pool_key, reusable=False)
+                raise
             self._is_configured = True
+            self._stop_rx()
+            self._rx_task = asyncio.create_task(self._rx_loop())
 
         return connected
 
     async def process_audio(self, audio_data: bytes) -> Optional[Dict[str, Any]]:
         """处理音频数据"""
+        if self.client is None:
+            raise Exception("Not connected to ASR server")
+
         if not self._is_configured:
             # 重新配置
             await self.client.send_config(
@@ -210,33 +434,46 @@ class ASRSession:
 
         await self.client.send_audio(audio_data)
 
+        # 非阻塞取出已到达的结果
         try:
-            # 非阻塞尝试接收结果
-            result = await asyncio.wait_for(
-                self.client.receive(),
-                timeout=0.1
-            )
-            return result
-        except asyncio.TimeoutError:
+            return self._results.get_nowait()
+        except asyncio.QueueEmpty:
             return None
 
     async def stop(self) -> Optional[Dict[str, Any]]:
         """停止ASR会话"""
-        await self.client.send_stop_speaking()
+        if self.client is None:
+            return None
 
+        result = None
+        is_final = False
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + 5.0
         try:
+            # 停止帧发送失败时同样在 finally 中归还连接（不可复用）
+            await self.client.send_stop_speaking()
+
             # 等待最终结果
-            result = await asyncio.wait_for(
-                self.client.receive(),
-                timeout=5.0
-            )
+            while not is_final:
+                result = await asyncio.wait_for(
+                    self._results.get(),
+                    timeout=max(0.0, deadline - loop.time())
+                )
+                is_final = bool(result.get("is_final"))
             return result
         except asyncio.TimeoutError:
-            return None
+            return result
         finally:
-            self.client.disconnect()
+            self._stop_rx()
+            # 只有收到最终结果的连接才归还连接池，避免残留结果串到下一个会话
+            await asr_pool.release(self.client, self._pool_key, reusable=is_final)
+            self.client = None
             self._is_configured = False
 
+    def append_text(self, text: str) -> None:
+        """追加转写文本（列表追加，读取时再拼接）"""
+        self._text_chunks.append(text)
+
     def get_transcript(self) -> str:
         """获取当前转写文本"""
-        return self._text_buffer
+        return "".join(self._text_chunks)
@@ -13,6 +13,7 @@ class Config:
 
     _instance: Optional['Config'] = None
     _config: Dict[str, Any] = {}
+    _flat: Dict[str, Any] = {}
 
     def __new__(cls) -> 'Config':
         if cls._instance is None:
@@ -30,56 +31,66 @@ class Config:
         else:
             self._config = {}
 
+        # 预先展开为点号路径 -> 值，get() 只需一次字典查找
+        flat: Dict[str, Any] = {}
+        self._flatten(self._config, '', flat)
+
+        # 环境变量覆盖在加载时一次性计算
+        for key in flat:
+            env_value = os.environ.get(key.upper().replace('.', '_'))
+            if env_value is not None:
+                flat[key] = env_value
+
+        self._flat = flat
+        self._asr = self._config.get('asr', {})
+        self._web = self._config.get('web', {})
+        self._llm = self._config.get('llm', {})
+        self._database = self._config.get('database', {})
+        self._frontend = self._config.get('frontend', {})
+
+    @classmethod
+    def _flatten(cls, node: Dict[str, Any], prefix: str, out: Dict[str, Any]) -> None:
+        """递归展开嵌套配置，中间节点同样保留（值为 None 的键视为未配置）"""
+        for k, v in node.items():
+            path = f"{prefix}{k}"
+            if v is None:
+                continue
+            out[path] = v
+            if isinstance(v, dict):
+                cls._flatten(v, f"{path}.", out)
+
     def reload(self) -> None:
         """重新加载配置"""
         self._load_config()
 
     def get(self, key: str, default: Any = None) -> Any:
-        """获取配置值，支持点号分隔的路径"""
-        keys = key.split('.')
-        value = self._config
-
-        for k in keys:
-            if isinstance(value, dict):
-                value = value.get(k)
-            else:
-                return default
-
-            if value is None:
-                return default
-
-        # 支持环境变量覆盖
-        env_key = key.upper().replace('.', '_')
-        env_value = os.environ.get(env_key)
-        if env_value is not None:
-            return env_value
-
-        return value
+        """获取配置值，支持点号分隔的路径（环境变量覆盖已在加载时合并）"""
+        return self._flat.get(key, default)
 
     @property
     def asr(self) -> Dict[str, Any]:
         """获取ASR配置"""
-        return self._config.get('asr', {})
+        return self._asr
 
     @property
     def web(self) -> Dict[str, Any]:
         """获取Web配置"""
-        return self._config.get('web', {})
+        return self._web
 
     @property
     def llm(self) -> Dict[str, Any]:
         """获取LLM配置"""
-        return self._config.get('llm', {})
+        return self._llm
 
     @property
     def database(self) -> Dict[str, Any]:
         """获取数据库配置"""
-        return self._config.get('database', {})
+        return self._database
 
     @property
     def frontend(self) -> Dict[str, Any]:
         """获取前端配置"""
-        return self._config.get('frontend', {})
+        return self._frontend
 
 
 # 全局配置实例
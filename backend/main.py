@@ -5,16 +5,20 @@ import asyncio
 import logging
 import os
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
+from functools import lru_cache
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 
 from fastapi import FastAPI, Request, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 
+import anyio
 import websockets
 
 # 支持直接运行 `python main.py`（非包方式）
@@ -26,9 +30,14 @@ if __name__ == "__main__" and (__package__ is None or __package__ == ""):
         sys.path.insert(0, str(backend_parent))
     __package__ = "backend"
 
+from .asr import AudioSendBuffer
 from .config import config
+from .models.user import user_model
 from .routes import api_router
-from .services import LLMService
+from .responses import ORJSONResponse
+from .services import LLMService, meeting_service
+from .services.auth_cache import cached_verify_token
+from .services.auth_service import parse_bearer_token
 
 # 配置日志
 def setup_logging():
@@ -52,37 +61,92 @@ logger = logging.getLogger(__name__)
 
 
 class RateLimitMiddleware:
-    """简单的速率限制中间件"""
+    """简单的速率限制中间件（双窗口滑动计数，O(1) 判定）"""
 
-    def __init__(self, requests_per_minute: int = 60):
+    WINDOW_SECONDS = 60.0
+    # 静态资源、健康检查和文档不计入限流
+    EXEMPT_PREFIXES = ('/static/', '/health', '/api/docs', '/api/redoc', '/api/openapi.json')
+
+    def __init__(self, requests_per_minute: int = 60, max_clients: int = 10000,
+                 exempt_prefixes: tuple = EXEMPT_PREFIXES):
         self.requests_per_minute = requests_per_minute
-        self.clients: dict = {}
+        self.max_clients = max_clients
+        self.exempt_prefixes = tuple(exempt_prefixes)
+        # client_ip -> [上一窗口计数, 当前窗口计数, 当前窗口起点]，按最近访问排序
+        self.clients: OrderedDict = OrderedDict()
 
     async def __call__(self, request: Request, call_next):
+        if request.url.path.startswith(self.exempt_prefixes):
+            return await call_next(request)
+
         client_ip = request.client.host
         current_time = time.time()
-
-        if client_ip not in self.clients:
-            self.clients[client_ip] = []
-
-        # 清理超过1分钟的请求记录
-        self.clients[client_ip] = [
-            t for t in self.clients[client_ip]
-            if current_time - t < 60
-        ]
+        window = self.WINDOW_SECONDS
+
+        entry = self.clients.get(client_ip)
+        if entry is None:
+            entry = [0, 0, current_time]
+            self.clients[client_ip] = entry
+            # 超出容量时淘汰最久未访问的IP
+            if len(self.clients) > self.max_clients:
+                self.clients.popitem(last=False)
+        else:
+            self.clients.move_to_end(client_ip)
+
+        # 滚动窗口
+        elapsed = current_time - entry[2]
+        if elapsed >= window:
+            skipped = int(elapsed // window)
+            entry[0] = entry[1] if skipped == 1 else 0
+            entry[1] = 0
+            entry[2] += skipped * window
+            elapsed = current_time - entry[2]
+
+        # 按上一窗口剩余比例加权估算最近60秒的请求数
+        estimated = entry[0] * (1 - elapsed / window) + entry[1]
 
         # 检查速率限制
-        if len(self.clients[client_ip]) >= self.requests_per_minute:
+        if estimated >= self.requests_per_minute:
             raise HTTPException(
                 status_code=429,
                 detail="Too many requests. Please slow down."
             )
 
-        self.clients[client_ip].append(current_time)
+        entry[1] += 1
 
         return await call_next(request)
 
 
+class AuthMiddleware:
+    """
+    认证中间件（纯 ASGI）
+    每个请求只解析一次 Authorization 头，结果写入 scope["user"]，
+    失败原因写入 scope["auth_error"]，由路由决定是否要求登录
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            user = None
+            auth_error = None
+            for name, value in scope["headers"]:
+                if name == b"authorization":
+                    token = parse_bearer_token(value.decode("latin-1"))
+                    if not token:
+                        auth_error = "无效的认证格式"
+                    else:
+                        user = cached_verify_token(token)
+                        if user is None:
+                            auth_error = "令牌无效或已过期"
+                    break
+            scope["user"] = user
+            scope["auth_error"] = auth_error
+
+        await self.app(scope, receive, send)
+
+
 # 创建速率限制器实例 - 开发环境使用更宽松的限制
 rate_limiter = RateLimitMiddleware(requests_per_minute=300)
 
@@ -97,9 +161,27 @@ async def lifespan(app: FastAPI):
     llm_available = await LLMService.is_available()
     logger.info(f"LLM服务可用: {llm_available}")
 
+    # 主页面启动时读取一次
+    app.state.index_html = load_index_html()
+
+    # 密码哈希放到独立的小线程池执行：argon2/PBKDF2 计算时释放 GIL，不占用事件循环，
+    # 也不与文件读写共用默认线程池；每次哈希自身按 parallelism 使用多个线程，池大小取核数的一半
+    app.state.kdf_pool = ThreadPoolExecutor(
+        max_workers=max(1, (os.cpu_count() or 1) // 2), thread_name_prefix="kdf"
+    )
+    user_model.set_kdf_executor(app.state.kdf_pool)
+
+    # 同步文件读写走线程池，放宽默认并发上限
+    anyio.to_thread.current_default_thread_limiter().total_tokens = 64
+
     yield
 
     # 关闭时
+    await meeting_service.flush_all_transcripts()
+    await LLMService.aclose()
+    user_model.set_kdf_executor(None)
+    app.state.kdf_pool.shutdown(wait=False, cancel_futures=True)
+
     # 清理速率限制器
     rate_limiter.clients.clear()
     logger.info("EchoCore 服务关闭")
@@ -120,11 +202,15 @@ app = FastAPI(
     description="智能会议助手，提供实时语音识别和会议总结功能",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/api/docs",
     redoc_url="/api/redoc",
     openapi_url="/api/openapi.json"
 )
 
+# 认证（最内层，CORS 预检和限流不需要解析令牌）
+app.add_middleware(AuthMiddleware)
+
 # CORS配置
 cors_origins = get_cors_origins()
 app.add_middleware(
@@ -148,46 +234,85 @@ if static_dir.exists():
 app.include_router(api_router)
 
 
+INDEX_PATH = static_dir / 'index.html'
+
+FALLBACK_INDEX_HTML = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>EchoCore</title>
+    <style>
+        body { font-family: Arial, sans-serif; margin: 40px; }
+        h1 { color: #333; }
+        .status { padding: 20px; background: #f0f0f0; border-radius: 8px; }
+    </style>
+</head>
+<body>
+    <h1>EchoCore</h1>
+    <div class="status">
+        <p>服务运行正常！</p>
+        <p>API文档: <a href="/api/docs">/api/docs</a></p>
+    </div>
+</body>
+</html>
+"""
+
+
+@lru_cache(maxsize=1)
+def _read_index_html(mtime: float) -> bytes:
+    """按修改时间缓存主页面内容"""
+    return INDEX_PATH.read_bytes()
+
+
+def load_index_html() -> Optional[bytes]:
+    """读取主页面，文件不存在时返回 None"""
+    try:
+        mtime = INDEX_PATH.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    return _read_index_html(mtime)
+
+
 @app.get("/", response_class=HTMLResponse, summary="主页面")
 async def root():
     """返回主页面"""
-    index_path = Path(__file__).parent.parent / 'frontend' / 'index.html'
-    if index_path.exists():
-        with open(index_path, 'r', encoding='utf-8') as f:
-            return f.read()
+    if config.web.get('debug', False):
+        # 调试模式下按 mtime 检测文件修改
+        index_html = load_index_html()
     else:
-        return """
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>EchoCore</title>
-            <style>
-                body { font-family: Arial, sans-serif; margin: 40px; }
-                h1 { color: #333; }
-                .status { padding: 20px; background: #f0f0f0; border-radius: 8px; }
-            </style>
-        </head>
-        <body>
-            <h1>EchoCore</h1>
-            <div class="status">
-                <p>服务运行正常！</p>
-                <p>API文档: <a href="/api/docs">/api/docs</a></p>
-            </div>
-        </body>
-        </html>
-        """
+        index_html = getattr(app.state, 'index_html', None) or load_index_html()
+
+    if index_html is None:
+        return HTMLResponse(content=FALLBACK_INDEX_HTML)
+    return HTMLResponse(content=index_html)
+
+
+# ASR代理每个方向的最大积压帧数（约 640ms 的 20ms 音频帧）
+ASR_PROXY_QUEUE_SIZE = 32
+
+
+# (生成地址时的 ASR 配置, 地址)：config.reload() 会替换 ASR 配置字典，字典未变时复用已解析的地址
+_asr_ws_url: Tuple[Optional[Dict[str, Any]], str] = (None, "")
 
 
 def get_asr_ws_url() -> str:
-    """获取后端连接ASR的WebSocket地址"""
+    """获取后端连接ASR的WebSocket地址（ASR 配置未重新加载时只解析一次）"""
+    global _asr_ws_url
+    asr_config, url = _asr_ws_url
+    if asr_config is config.asr:
+        return url
+
+    asr_config = config.asr
     scheme = config.get('asr.ws_scheme', 'ws')
-    host = config.asr.get('host', '127.0.0.1')
-    port = config.asr.get('port', 10095)
+    host = asr_config.get('host', '127.0.0.1')
+    port = asr_config.get('port', 10095)
 
     if host in ('0.0.0.0', '::', ''):
         host = '127.0.0.1'
 
-    return f"{scheme}://{host}:{port}/"
+    url = f"{scheme}://{host}:{port}/"
+    _asr_ws_url = (asr_config, url)
+    return url
 
 
 @app.websocket('/ws/asr')
@@ -217,41 +342,71 @@ async def asr_ws_proxy(websocket: WebSocket):
             proxy=None,
         ) as asr_socket:
 
-            async def client_to_asr():
-                while True:
-                    message = await websocket.receive()
-                    msg_type = message.get('type')
+            # 合并小块音频帧，减少发往ASR的帧数和系统调用
+            send_buffer = AudioSendBuffer(asr_socket.send)
 
-                    if msg_type == 'websocket.disconnect':
-                        raise WebSocketDisconnect()
+            # 有界队列提供背压：下游变慢时上游的 put 会挂起，不再无限读取
+            to_asr: asyncio.Queue = asyncio.Queue(maxsize=ASR_PROXY_QUEUE_SIZE)
+            to_client: asyncio.Queue = asyncio.Queue(maxsize=ASR_PROXY_QUEUE_SIZE)
 
-                    text_payload = message.get('text')
-                    if text_payload is not None:
-                        await asr_socket.send(text_payload)
-                        continue
+            async def client_reader():
+                receive = websocket.receive
+                put = to_asr.put
+                while True:
+                    message = await receive()
+                    # 音频二进制帧是主要流量，优先判断
+                    payload = message.get('bytes')
+                    if payload is None:
+                        payload = message.get('text')
+                        if payload is None:
+                            if message['type'] == 'websocket.disconnect':
+                                raise WebSocketDisconnect()
+                            continue
+                    await put(payload)
+
+            async def asr_writer():
+                get = to_asr.get
+                write_audio = send_buffer.write
+                send_text = send_buffer.send_text
+                while True:
+                    payload = await get()
+                    if type(payload) is bytes:
+                        await write_audio(payload)
+                    else:
+                        await send_text(payload)
 
-                    bytes_payload = message.get('bytes')
-                    if bytes_payload is not None:
-                        await asr_socket.send(bytes_payload)
+            async def asr_reader():
+                recv = asr_socket.recv
+                put = to_client.put
+                while True:
+                    await put(await recv())
 
-            async def asr_to_client():
+            async def client_writer():
+                get = to_client.get
+                send_bytes = websocket.send_bytes
+                send_text = websocket.send_text
                 while True:
-                    message = await asr_socket.recv()
-                    if isinstance(message, bytes):
-                        await websocket.send_bytes(message)
+                    message = await get()
+                    if type(message) is bytes:
+                        await send_bytes(message)
                     else:
-                        await websocket.send_text(message)
+                        await send_text(message)
 
-            task_client_to_asr = asyncio.create_task(client_to_asr())
-            task_asr_to_client = asyncio.create_task(asr_to_client())
+            tasks = {
+                asyncio.create_task(client_reader()),
+                asyncio.create_task(asr_writer()),
+                asyncio.create_task(asr_reader()),
+                asyncio.create_task(client_writer()),
+            }
 
             done, pending = await asyncio.wait(
-                {task_client_to_asr, task_asr_to_client},
+                tasks,
                 return_when=asyncio.FIRST_EXCEPTION,
             )
 
             for task in pending:
                 task.cancel()
+            send_buffer.close()
 
             for task in done:
                 exc = task.exception()
@@ -313,7 +468,18 @@ if __name__ == "__main__":
     host = config.web.get('host', '0.0.0.0')
     port = config.web.get('port', 8080)
 
+    debug = config.web.get('debug', False)
+
     print(f"启动会议助手服务: http://{host}:{port}")
     print(f"API文档: http://{host}:{port}/api/docs")
 
-    uvicorn.run(app, host=host, port=port, reload=config.web.get('debug', False))
+    # uvloop + httptools（uvicorn[standard] 自带，Windows 下没有 uvloop）
+    server_options = {
+        "host": host,
+        "port": port,
+        "loop": "uvloop" if os.name != "nt" else "auto",
+        "http": "httptools",
+    }
+
+    # 只运行单个工作进程：用户名索引、上传会话、会议缓存和排队转写等状态都在进程内存中
+    uvicorn.run(app, reload=debug, **server_options)
@@ -1,11 +1,12 @@
 """
 数据模型定义
 """
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 from uuid import uuid4
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class MeetingCreate(BaseModel):
@@ -25,13 +26,14 @@ class MeetingResponse(BaseModel):
     updated_at: datetime
     duration: Optional[int] = None  # 会议时长（秒）
     transcript: Optional[str] = None  # 完整 transcript
-    summary: Optional[str] = None  # LLM总结
+    summary: Optional[Union[str, Dict[str, Any]]] = None  # LLM总结
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
-class TranscriptSegment(BaseModel):
+# 以下为内部数据结构，只由服务端代码构造，不需要 Pydantic 校验
+@dataclass(slots=True, frozen=True)
+class TranscriptSegment:
     """语音识别片段"""
     text: str
     start_time: float
@@ -39,7 +41,8 @@ class TranscriptSegment(BaseModel):
     is_final: bool
 
 
-class AudioChunk(BaseModel):
+@dataclass(slots=True, frozen=True)
+class AudioChunk:
     """音频块（WebSocket传输用）"""
     mode: str
     wav_name: str
@@ -49,7 +52,8 @@ class AudioChunk(BaseModel):
     audio_data: Optional[bytes] = None  # 二进制音频数据
 
 
-class ASRResult(BaseModel):
+@dataclass(slots=True, frozen=True)
+class ASRResult:
     """ASR识别结果"""
     mode: str
     text: str
@@ -0,0 +1,54 @@
+"""
+密码哈希
+纯函数实现，可在线程池或进程池中执行（模块导入无副作用）
+"""
+import hashlib
+import hmac
+from functools import lru_cache
+from typing import Optional
+
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+
+# Argon2id 默认参数（可在配置 auth.password_hash 中按部署机器调整）
+DEFAULT_TIME_COST = 2
+DEFAULT_MEMORY_COST = 65536
+DEFAULT_PARALLELISM = 2
+
+
+@lru_cache(maxsize=8)
+def get_password_hasher(time_cost: int = DEFAULT_TIME_COST,
+                        memory_cost: int = DEFAULT_MEMORY_COST,
+                        parallelism: int = DEFAULT_PARALLELISM) -> PasswordHasher:
+    """按参数获取 Argon2id 哈希器（C 实现，内部并行计算）"""
+    return PasswordHasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+
+
+def hash_password(password: str, time_cost: int = DEFAULT_TIME_COST,
+                  memory_cost: int = DEFAULT_MEMORY_COST,
+                  parallelism: int = DEFAULT_PARALLELISM) -> str:
+    """加密密码（Argon2id，盐值和参数已编码在哈希串中）"""
+    return get_password_hasher(time_cost, memory_cost, parallelism).hash(password)
+
+
+def check_password(stored: str, salt: Optional[str], password: str) -> bool:
+    """校验密码，兼容旧版 PBKDF2-SHA256 记录（带独立 salt 字段）"""
+    stored = stored or ''
+    if salt:
+        legacy = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
+        return hmac.compare_digest(legacy.hex(), stored)
+
+    try:
+        # 校验使用哈希串中记录的参数，与当前配置无关
+        return get_password_hasher().verify(stored, password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+
+def needs_rehash(stored: str, salt: Optional[str], time_cost: int = DEFAULT_TIME_COST,
+                 memory_cost: int = DEFAULT_MEMORY_COST,
+                 parallelism: int = DEFAULT_PARALLELISM) -> bool:
+    """旧版 PBKDF2 记录或参数与当前配置不一致的 Argon2 哈希需要重新计算"""
+    if salt:
+        return True
+    return get_password_hasher(time_cost, memory_cost, parallelism).check_needs_rehash(stored or '')
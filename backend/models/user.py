@@ -1,14 +1,38 @@
 """
 用户认证模型
 """
-import json
+import asyncio
+import os
+import secrets
+import threading
+from concurrent.futures import Executor
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Dict, Any
 from uuid import uuid4
-import hashlib
+
+import orjson
+from fastapi.concurrency import run_in_threadpool
 
 from ..config import config
+from .password import (
+    DEFAULT_MEMORY_COST,
+    DEFAULT_PARALLELISM,
+    DEFAULT_TIME_COST,
+    check_password,
+    hash_password,
+    needs_rehash,
+)
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """先写临时文件并落盘，再原子替换，进程中途退出不会留下写了一半的文件"""
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
 
 
 class UserModel:
@@ -17,80 +41,233 @@ class UserModel:
     def __init__(self):
         self.data_dir = Path(__file__).parent.parent.parent / 'data' / 'users'
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        self._json_option = orjson.OPT_INDENT_2 if config.web.get('debug', False) else 0
+        self.index_path = self.data_dir.parent / 'users_index.json'
+        self._index_lock = threading.Lock()
+        self._username_index: Dict[str, str] = self._load_username_index()
+
+        # 登录时间走追加日志，避免每次登录重写整个用户文件
+        self.login_log_path = self.data_dir.parent / 'last_login.jsonl'
+        self._login_lock = threading.Lock()
+        self._last_login: Dict[str, str] = self._compact_login_log()
+        self._login_log = open(self.login_log_path, 'ab', buffering=0)
+
+        # 密码哈希执行器（由应用启动时注入专用线程池），未注入时使用默认线程池
+        self._kdf_executor: Optional[Executor] = None
+        # Argon2id 参数 (time_cost, memory_cost, parallelism)，参数变化后用户登录时自动重新哈希
+        self._hash_params = (
+            int(config.get('auth.password_hash.time_cost', DEFAULT_TIME_COST)),
+            int(config.get('auth.password_hash.memory_cost', DEFAULT_MEMORY_COST)),
+            int(config.get('auth.password_hash.parallelism', DEFAULT_PARALLELISM)),
+        )
+        # 用户不存在时也校验一次这个哈希，使两条分支耗时一致，避免通过响应时间枚举用户名
+        self._dummy_hash = hash_password(secrets.token_urlsafe(16), *self._hash_params)
+
+    def set_kdf_executor(self, executor: Optional[Executor]) -> None:
+        """设置异步接口使用的密码哈希执行器"""
+        self._kdf_executor = executor
+
+    async def _run_kdf(self, func, *args):
+        """在执行器中运行密码哈希，避免阻塞事件循环"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._kdf_executor, func, *args)
+
+    def _dumps_record(self, user: Dict[str, Any]) -> bytes:
+        """序列化用户记录：默认紧凑格式，调试模式下缩进便于查看"""
+        return orjson.dumps(user, option=self._json_option)
 
     def _get_user_path(self, user_id: str) -> Path:
         """获取用户数据文件路径"""
         return self.data_dir / f"{user_id}.json"
 
-    def _hash_password(self, password: str, salt: str = None) -> tuple:
-        """加密密码"""
-        if salt is None:
-            salt = uuid4().hex[:16]
-        hash_obj = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
-        return hash_obj.hex(), salt
+    def _load_username_index(self) -> Dict[str, str]:
+        """加载 username -> user_id 索引，不存在或损坏时扫描用户目录重建"""
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, 'rb') as f:
+                    index = orjson.loads(f.read())
+                if isinstance(index, dict):
+                    return index
+            except (OSError, ValueError):
+                pass
+
+        index: Dict[str, str] = {}
+        for path in self.data_dir.glob('*.json'):
+            try:
+                with open(path, 'rb') as f:
+                    user = orjson.loads(f.read())
+                index[user['username']] = user['id']
+            except (OSError, ValueError, KeyError):
+                continue
+
+        self._save_username_index(index)
+        return index
+
+    def _save_username_index(self, index: Dict[str, str]) -> None:
+        """原子写入用户名索引"""
+        _atomic_write(self.index_path, orjson.dumps(index))
+
+    def _compact_login_log(self) -> Dict[str, str]:
+        """读取登录日志，按用户保留最新一条并重写日志"""
+        last_login: Dict[str, str] = {}
+        if not self.login_log_path.exists():
+            return last_login
+
+        with open(self.login_log_path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = orjson.loads(line)
+                    last_login[entry['id']] = entry['ts']
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+        tmp_path = self.login_log_path.with_suffix('.jsonl.tmp')
+        with open(tmp_path, 'wb') as f:
+            for user_id, ts in last_login.items():
+                f.write(orjson.dumps({"id": user_id, "ts": ts}) + b"\n")
+        os.replace(tmp_path, self.login_log_path)
+
+        return last_login
+
+    def _record_login(self, user_id: str) -> str:
+        """追加一条登录记录"""
+        ts = datetime.now().isoformat()
+        with self._login_lock:
+            self._last_login[user_id] = ts
+            self._login_log.write(orjson.dumps({"id": user_id, "ts": ts}) + b"\n")
+        return ts
+
+    def _write_user(self, user: Dict[str, Any]) -> None:
+        """原子写入用户记录"""
+        _atomic_write(self._get_user_path(user['id']), self._dumps_record(user))
+
+    def _read_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """读取完整用户记录（含密码哈希）"""
+        user_path = self._get_user_path(user_id)
+        if not user_path.exists():
+            return None
 
-    def create_user(self, username: str, password: str, email: str = None) -> Dict[str, Any]:
-        """创建新用户"""
-        # 检查用户名是否已存在
-        existing = self.get_user_by_username(username)
-        if existing:
-            raise ValueError("用户名已存在")
+        with open(user_path, 'rb') as f:
+            return orjson.loads(f.read())
 
-        user_id = str(uuid4())
+    def _hash_password(self, password: str) -> str:
+        """加密密码（Argon2id，盐值已编码在哈希串中）"""
+        return hash_password(password, *self._hash_params)
 
-        # 加密密码
-        password_hash, salt = self._hash_password(password)
+    def _check_password(self, user: Dict[str, Any], password: str) -> bool:
+        """校验密码，兼容旧版 PBKDF2-SHA256 记录"""
+        return check_password(user.get('password_hash'), user.get('salt'), password)
+
+    def _needs_rehash(self, user: Dict[str, Any]) -> bool:
+        """旧版 PBKDF2 记录或参数过期的 Argon2 哈希需要重新计算"""
+        return needs_rehash(user.get('password_hash'), user.get('salt'), *self._hash_params)
+
+    def _set_password(self, user: Dict[str, Any], password_hash: str) -> None:
+        """写入新密码哈希并移除旧版 salt 字段"""
+        user['password_hash'] = password_hash
+        user.pop('salt', None)
+
+    def _insert_user(self, username: str, password_hash: str, email: str = None) -> Dict[str, Any]:
+        """保存新用户记录并更新用户名索引"""
+        user_id = str(uuid4())
 
         user = {
             "id": user_id,
             "username": username,
             "password_hash": password_hash,
-            "salt": salt,
             "email": email,
             "created_at": datetime.now().isoformat(),
             "updated_at": datetime.now().isoformat(),
             "last_login": None
         }
 
-        # 保存用户
-        user_path = self._get_user_path(user_id)
-        with open(user_path, 'w', encoding='utf-8') as f:
-            json.dump(user, f, ensure_ascii=False, indent=2)
+        with self._index_lock:
+            # 哈希计算期间可能有并发注册，加锁后再次检查
+            if username in self._username_index:
+                raise ValueError("用户名已存在")
+
+            # 保存用户
+            self._write_user(user)
+
+            # 更新用户名索引
+            self._username_index[username] = user_id
+            self._save_username_index(self._username_index)
 
         # 返回不带密码的用户信息
         return self._to_user_response(user)
 
+    def create_user(self, username: str, password: str, email: str = None) -> Dict[str, Any]:
+        """创建新用户"""
+        # 检查用户名是否已存在
+        existing = self.get_user_by_username(username)
+        if existing:
+            raise ValueError("用户名已存在")
+
+        # 加密密码
+        password_hash = self._hash_password(password)
+
+        return self._insert_user(username, password_hash, email)
+
+    async def create_user_async(self, username: str, password: str, email: str = None) -> Dict[str, Any]:
+        """创建新用户（密码哈希在执行器中计算，文件读写在线程池中执行）"""
+        existing = await run_in_threadpool(self.get_user_by_username, username)
+        if existing:
+            raise ValueError("用户名已存在")
+
+        password_hash = await self._run_kdf(hash_password, password, *self._hash_params)
+
+        return await run_in_threadpool(self._insert_user, username, password_hash, email)
+
+    def _complete_login(self, user: Dict[str, Any], new_hash: Optional[str] = None) -> Dict[str, Any]:
+        """登录成功后的处理：升级旧哈希并记录登录时间"""
+        # 旧版哈希在登录成功时透明升级
+        if new_hash:
+            self._set_password(user, new_hash)
+            self._write_user(user)
+
+        # 更新最后登录时间
+        user['last_login'] = self._record_login(user['id'])
+
+        return self._to_user_response(user)
+
     def verify_password(self, username: str, password: str) -> Optional[Dict[str, Any]]:
         """验证用户密码"""
         user = self.get_user_by_username(username)
         if not user:
+            check_password(self._dummy_hash, None, password)
             return None
 
-        password_hash, _ = self._hash_password(password, user['salt'])
+        if self._check_password(user, password):
+            new_hash = self._hash_password(password) if self._needs_rehash(user) else None
+            return self._complete_login(user, new_hash)
+
+        return None
 
-        if password_hash == user['password_hash']:
-            # 更新最后登录时间
-            user['last_login'] = datetime.now().isoformat()
-            user_path = self._get_user_path(user['id'])
-            with open(user_path, 'w', encoding='utf-8') as f:
-                json.dump(user, f, ensure_ascii=False, indent=2)
+    async def verify_password_async(self, username: str, password: str) -> Optional[Dict[str, Any]]:
+        """验证用户密码（密码哈希在执行器中计算，文件读写在线程池中执行）"""
+        user = await run_in_threadpool(self.get_user_by_username, username)
+        if not user:
+            await self._run_kdf(check_password, self._dummy_hash, None, password)
+            return None
 
-            return self._to_user_response(user)
+        if await self._run_kdf(check_password, user.get('password_hash'), user.get('salt'), password):
+            new_hash = None
+            if self._needs_rehash(user):
+                new_hash = await self._run_kdf(hash_password, password, *self._hash_params)
+            return await run_in_threadpool(self._complete_login, user, new_hash)
 
         return None
 
     def get_user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
         """根据用户名获取用户"""
-        if not self.data_dir.exists():
+        user_id = self._username_index.get(username)
+        if not user_id:
             return None
 
-        for path in self.data_dir.glob('*.json'):
-            with open(path, 'r', encoding='utf-8') as f:
-                user = json.load(f)
-                if user['username'] == username:
-                    return user
-
-        return None
+        user = self._read_user(user_id)
+        if not user or user.get('username') != username:
+            return None
+        return user
 
     def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
         """根据ID获取用户"""
@@ -99,8 +276,8 @@ class UserModel:
         if not user_path.exists():
             return None
 
-        with open(user_path, 'r', encoding='utf-8') as f:
-            return self._to_user_response(json.load(f))
+        with open(user_path, 'rb') as f:
+            return self._to_user_response(orjson.loads(f.read()))
 
     def update_user(self, user_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """更新用户信息"""
@@ -110,8 +287,10 @@ class UserModel:
 
         # 读取完整用户信息
         user_path = self._get_user_path(user_id)
-        with open(user_path, 'r', encoding='utf-8') as f:
-            full_user = json.load(f)
+        with open(user_path, 'rb') as f:
+            full_user = orjson.loads(f.read())
+
+        old_username = full_user['username']
 
         # 更新字段
         for key, value in data.items():
@@ -121,8 +300,13 @@ class UserModel:
         full_user['updated_at'] = datetime.now().isoformat()
 
         # 保存
-        with open(user_path, 'w', encoding='utf-8') as f:
-            json.dump(full_user, f, ensure_ascii=False, indent=2)
+        self._write_user(full_user)
+
+        if full_user['username'] != old_username:
+            with self._index_lock:
+                self._username_index.pop(old_username, None)
+                self._username_index[full_user['username']] = user_id
+                self._save_username_index(self._username_index)
 
         return self._to_user_response(full_user)
 
@@ -133,22 +317,18 @@ class UserModel:
         if not user_path.exists():
             return False
 
-        with open(user_path, 'r', encoding='utf-8') as f:
-            user = json.load(f)
+        with open(user_path, 'rb') as f:
+            user = orjson.loads(f.read())
 
         # 验证旧密码
-        old_hash, _ = self._hash_password(old_password, user['salt'])
-        if old_hash != user['password_hash']:
+        if not self._check_password(user, old_password):
             return False
 
         # 设置新密码
-        new_hash, new_salt = self._hash_password(new_password)
-        user['password_hash'] = new_hash
-        user['salt'] = new_salt
+        self._set_password(user, self._hash_password(new_password))
         user['updated_at'] = datetime.now().isoformat()
 
-        with open(user_path, 'w', encoding='utf-8') as f:
-            json.dump(user, f, ensure_ascii=False, indent=2)
+        self._write_user(user)
 
         return True
 
@@ -159,7 +339,7 @@ class UserModel:
             "username": user["username"],
             "email": user.get("email"),
             "created_at": user["created_at"],
-            "last_login": user.get("last_login")
+            "last_login": self._last_login.get(user["id"], user.get("last_login"))
         }
 
 
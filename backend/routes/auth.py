@@ -2,69 +2,60 @@
 用户认证路由
 登录、注册、Token验证
 """
-from fastapi import APIRouter, HTTPException, status, Header
-from pydantic import BaseModel
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from typing import Any, Dict
 
 from ..models.user import user_model
 from ..services.auth_service import AuthService
+from .deps import TokenUser, read_json_body
 
 router = APIRouter(prefix="/auth", tags=["认证"])
 
 
-class LoginRequest(BaseModel):
-    """登录请求"""
-    username: str
-    password: str
-
-
-class LoginResponse(BaseModel):
-    """登录响应"""
-    access_token: str
-    token_type: str = "bearer"
-    user: dict
-
-
-class RegisterRequest(BaseModel):
-    """注册请求"""
-    username: str
-    password: str
-    email: Optional[str] = None
-
-
-class RegisterResponse(BaseModel):
-    """注册响应"""
-    message: str
-    user: dict
+def _body_schema(required: tuple, optional: tuple = ()) -> dict:
+    """请求体的 OpenAPI 描述（接口不走 Pydantic 解析，手动补充文档）"""
+    properties = {name: {"type": "string"} for name in required + optional}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "object", "required": list(required), "properties": properties}
+                }
+            }
+        }
+    }
 
 
-class TokenPayload(BaseModel):
-    """Token载荷"""
-    user_id: str
-    username: str
+def _str_field(data: Dict[str, Any], name: str) -> str:
+    value = data.get(name)
+    return value if isinstance(value, str) else ""
 
 
-@router.post("/login", response_model=LoginResponse, summary="用户登录")
-async def login(request: LoginRequest):
+@router.post("/login", summary="用户登录", openapi_extra=_body_schema(("username", "password")))
+async def login(request: Request):
     """
     用户登录
 
     - username: 用户名
     - password: 密码
     """
-    username = (request.username or "").strip()
+    data = await read_json_body(request)
+    username = _str_field(data, "username").strip()
+    password = _str_field(data, "password")
     if not username:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="用户名不能为空"
         )
-    if not request.password:
+    if not password:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="密码不能为空"
         )
 
-    user = user_model.verify_password(username, request.password)
+    user = await user_model.verify_password_async(username, password)
 
     if not user:
         raise HTTPException(
@@ -82,8 +73,8 @@ async def login(request: LoginRequest):
     }
 
 
-@router.post("/register", response_model=LoginResponse, summary="用户注册")
-async def register(request: RegisterRequest):
+@router.post("/register", summary="用户注册", openapi_extra=_body_schema(("username", "password"), ("email",)))
+async def register(request: Request):
     """
     用户注册（注册后自动登录）
 
@@ -91,18 +82,20 @@ async def register(request: RegisterRequest):
     - password: 密码（必填）
     - email: 邮箱（可选）
     """
+    data = await read_json_body(request)
     try:
-        username = (request.username or "").strip()
-        email = (request.email or "").strip() or None
+        username = _str_field(data, "username").strip()
+        password = _str_field(data, "password")
+        email = _str_field(data, "email").strip() or None
 
         if not username:
             raise ValueError("用户名不能为空")
-        if not request.password:
+        if not password:
             raise ValueError("密码不能为空")
 
-        user = user_model.create_user(
+        user = await user_model.create_user_async(
             username=username,
-            password=request.password,
+            password=password,
             email=email
         )
 
@@ -122,42 +115,15 @@ async def register(request: RegisterRequest):
 
 
 @router.get("/me", summary="获取当前用户信息")
-async def get_current_user(Authorization: Optional[str] = Header(None)):
+async def get_current_user(token_data: TokenUser):
     """
     获取当前登录用户信息
 
     需要在请求头中携带: Authorization: Bearer <token>
     """
-    if not Authorization:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="缺少认证令牌"
-        )
-
-    # 解析 Bearer token
-    try:
-        prefix, token = Authorization.split()
-        if prefix.lower() != "bearer":
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="无效的认证格式"
-            )
-    except (ValueError, AttributeError):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="无效的认证格式"
-        )
 
-    # 验证token
-    token_data = AuthService.verify_token(token)
-    if not token_data:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="令牌无效或已过期"
-        )
-
-    # 获取用户信息
-    user = user_model.get_user(token_data['user_id'])
+    # 获取用户信息（读文件，放到线程池）
+    user = await run_in_threadpool(user_model.get_user, token_data['user_id'])
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -168,35 +134,12 @@ async def get_current_user(Authorization: Optional[str] = Header(None)):
 
 
 @router.post("/refresh", summary="刷新访问令牌")
-async def refresh_token(Authorization: Optional[str] = Header(None)):
+async def refresh_token(token_data: TokenUser):
     """
     刷新访问令牌
 
     需要提供有效的旧令牌
     """
-    if not Authorization:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="缺少认证令牌"
-        )
-
-    try:
-        prefix, token = Authorization.split()
-        if prefix.lower() != "bearer":
-            raise ValueError()
-    except (ValueError, AttributeError):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="无效的认证格式"
-        )
-
-    # 验证旧token并创建新token
-    token_data = AuthService.verify_token(token)
-    if not token_data:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="令牌无效或已过期"
-        )
 
     new_token = AuthService.create_access_token(token_data['user_id'], token_data['username'])
 
@@ -0,0 +1,93 @@
+"""
+路由公共依赖
+认证结果由 AuthMiddleware 写入 scope，这里只负责读取并在 OpenAPI 中声明 Bearer 认证
+"""
+from typing import Annotated, Any, Dict, Optional
+
+import orjson
+from fastapi import Depends, HTTPException, Request, Security, status
+from fastapi.security import HTTPBearer
+
+# zstd 压缩请求体解压后的大小上限
+MAX_DECOMPRESSED_BODY = 16 * 1024 * 1024
+
+
+class ScopeBearer(HTTPBearer):
+    """Bearer 认证方案：令牌已由 AuthMiddleware 解析验证，直接返回 scope 中的用户"""
+
+    async def __call__(self, request: Request) -> Optional[dict]:
+        return request.scope.get("user")
+
+
+bearer_scheme = ScopeBearer(scheme_name="BearerAuth", auto_error=False)
+
+
+async def get_current_user(user: Optional[dict] = Security(bearer_scheme)) -> Optional[dict]:
+    """当前用户（未登录或令牌无效时为 None）"""
+    return user
+
+
+def _user_required(missing_detail: str):
+    """生成要求登录的依赖，未通过认证时抛出 401"""
+    async def dependency(request: Request, user: Optional[dict] = Security(bearer_scheme)) -> dict:
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=request.scope.get("auth_error") or missing_detail,
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+        return user
+    return dependency
+
+
+require_auth = _user_required("请先登录后再使用")
+require_token = _user_required("缺少认证令牌")
+
+# 路由参数类型
+CurrentUser = Annotated[dict, Depends(require_auth)]
+OptionalUser = Annotated[Optional[dict], Depends(get_current_user)]
+TokenUser = Annotated[dict, Depends(require_token)]
+
+
+async def read_json_body(request: Request, allow_zstd: bool = False) -> Dict[str, Any]:
+    """用 orjson 直接解析 JSON 请求体（不经过 Pydantic），可选支持 zstd 压缩"""
+    body = await request.body()
+
+    encoding = request.headers.get("content-encoding", "").strip().lower()
+    if encoding and encoding != "identity":
+        if not (allow_zstd and encoding == "zstd"):
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=f"不支持的 Content-Encoding: {encoding}"
+            )
+        body = _decompress_zstd(body)
+
+    try:
+        data = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        data = None
+    if not isinstance(data, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="请求体必须是JSON对象"
+        )
+    return data
+
+
+def _decompress_zstd(body: bytes) -> bytes:
+    """解压 zstd 请求体（需要安装 zstandard）"""
+    try:
+        import zstandard
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="服务端未安装 zstandard，不支持 zstd 压缩"
+        )
+
+    try:
+        return zstandard.ZstdDecompressor().decompress(body, max_output_size=MAX_DECOMPRESSED_BODY)
+    except zstandard.ZstdError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="zstd 请求体解压失败"
+        )
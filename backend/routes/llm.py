@@ -1,15 +1,24 @@
 """
 LLM API路由
 """
-from fastapi import APIRouter, HTTPException
+import asyncio
+import time
+
+from fastapi import APIRouter, HTTPException, Request
 
 from ..models import SummarizeRequest, SummarizeResponse
 from ..services import LLMService
+from .deps import read_json_body
 
 router = APIRouter(prefix="/llm", tags=["llm"])
 
+# 可用性探测结果缓存（秒）
+STATUS_CACHE_TTL = 10
+_status_cache = {"value": None, "expires": 0.0}
+_status_lock = asyncio.Lock()
+
 
-@router.post("/summarize", response_model=SummarizeResponse, summary="文本总结")
+@router.post("/summarize", responses={200: {"model": SummarizeResponse}}, summary="文本总结")
 async def summarize(request: SummarizeRequest):
     """对文本进行总结"""
     try:
@@ -17,12 +26,12 @@ async def summarize(request: SummarizeRequest):
             text=request.text,
             options=request.options
         )
-        return SummarizeResponse(
-            summary=result.get('summary', ''),
-            key_points=result.get('key_points', []),
-            todos=result.get('todos', []),
-            decisions=result.get('decisions', [])
-        )
+        return {
+            "summary": result.get('summary', ''),
+            "key_points": result.get('key_points', []),
+            "todos": result.get('todos', []),
+            "decisions": result.get('decisions', [])
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -30,13 +39,22 @@ async def summarize(request: SummarizeRequest):
 @router.get("/status", summary="LLM服务状态")
 async def llm_status():
     """检查LLM服务是否可用"""
-    available = await LLMService.is_available()
-    return {"available": available}
+    if time.monotonic() < _status_cache["expires"]:
+        return {"available": _status_cache["value"]}
+
+    # 并发请求只探测一次，其余等待结果
+    async with _status_lock:
+        if time.monotonic() >= _status_cache["expires"]:
+            _status_cache["value"] = await LLMService.is_available()
+            _status_cache["expires"] = time.monotonic() + STATUS_CACHE_TTL
+
+    return {"available": _status_cache["value"]}
 
 
 @router.post("/extract-todos", summary="提取待办事项")
-async def extract_todos(data: dict):
+async def extract_todos(request: Request):
     """从文本中提取待办事项"""
+    data = await read_json_body(request)
     text = data.get("text", "")
     if not text:
         raise HTTPException(status_code=400, detail="Text is required")
@@ -55,8 +73,9 @@ async def extract_todos(data: dict):
 
 
 @router.post("/extract-decisions", summary="提取决策事项")
-async def extract_decisions(data: dict):
+async def extract_decisions(request: Request):
     """从文本中提取决策事项"""
+    data = await read_json_body(request)
     text = data.get("text", "")
     if not text:
         raise HTTPException(status_code=400, detail="Text is required")
@@ -1,67 +1,83 @@
 """
 会议管理API路由
 """
+import asyncio
+import hashlib
+import logging
 from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException, Depends, Header
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import APIRouter, HTTPException, Request, Response
 
-from ..models import MeetingCreate, MeetingResponse, MeetingListItem
-from ..services import meeting_service
-from ..services.auth_service import AuthService
+from ..models import MeetingCreate, MeetingListItem, MeetingResponse
+from ..responses import ORJSONResponse
+from ..services import LLMService, meeting_service
+from .deps import CurrentUser, OptionalUser, read_json_body
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/meetings", tags=["meetings"])
 
-# HTTP Bearer 认证
-security = HTTPBearer()
+# 会议结束后自动生成总结，选项与前端“生成纪要”一致，可以共用 LLM 结果缓存
+AUTO_SUMMARY_OPTIONS = {
+    "extract_todos": True,
+    "extract_decisions": True,
+    "summary_length": "detailed",
+    "allow_rule_fallback": False
+}
+_summary_tasks: set = set()
 
+# 会议详情对外暴露的字段（与 MeetingResponse 一致）
+MEETING_DETAIL_FIELDS = ("id", "name", "mode", "status", "created_at", "updated_at",
+                         "duration", "transcript", "summary")
 
-async def get_current_user(Authorization: Optional[str] = Header(None)) -> dict:
-    """获取当前用户（可选认证）"""
-    if not Authorization:
-        return None
+# 响应模型只用于生成文档，服务层数据已是可序列化的字典，不再经过 Pydantic 校验
+MEETING_DETAIL_DOC = {200: {"model": MeetingResponse}}
+MEETING_LIST_DOC = {200: {"model": List[MeetingListItem]}}
 
-    try:
-        prefix, token = Authorization.split()
-        if prefix.lower() != "bearer":
-            return None
-    except (ValueError, AttributeError):
-        return None
 
-    token_data = AuthService.verify_token(token)
-    if not token_data:
-        return None
+def _meeting_detail(meeting: dict) -> dict:
+    """裁剪为 MeetingResponse 字段"""
+    return {field: meeting.get(field) for field in MEETING_DETAIL_FIELDS}
 
-    return {
-        "user_id": token_data["user_id"],
-        "username": token_data["username"]
-    }
 
+# 会议读取接口的缓存策略：客户端可短暂复用，过期后用 If-None-Match 重新验证
+CACHE_CONTROL = "private, max-age=2"
 
-async def require_auth(Authorization: Optional[str] = Header(None)) -> dict:
-    """获取当前用户（需要有效的 token，否则抛出 401）"""
-    if not Authorization:
-        raise HTTPException(status_code=401, detail="请先登录后再使用")
 
-    try:
-        prefix, token = Authorization.split()
-        if prefix.lower() != "bearer":
-            raise HTTPException(status_code=401, detail="无效的认证格式")
-    except (ValueError, AttributeError):
-        raise HTTPException(status_code=401, detail="无效的认证格式")
+def _make_etag(meeting_id: str, updated_at: str) -> str:
+    """按会议 ID 和最后修改时间生成弱 ETag"""
+    digest = hashlib.blake2b(f"{meeting_id}:{updated_at}".encode(), digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match 是否命中（支持多个值和 *）"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {value.strip() for value in header.split(",")}
+    return "*" in candidates or etag in candidates
 
-    token_data = AuthService.verify_token(token)
-    if not token_data:
-        raise HTTPException(status_code=401, detail="令牌无效或已过期")
 
-    return {
-        "user_id": token_data["user_id"],
-        "username": token_data["username"]
-    }
+async def _check_not_modified(request: Request, meeting_id: str) -> Optional[Response]:
+    """带 If-None-Match 时先查索引中的修改时间，命中则直接返回 304，不读取会议文件"""
+    if "if-none-match" not in request.headers:
+        return None
+    updated_at = await meeting_service.get_updated_at(meeting_id)
+    if updated_at is None:
+        return None
+    etag = _make_etag(meeting_id, updated_at)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    return None
 
 
-@router.post("", response_model=MeetingResponse, summary="创建新会议")
-async def create_meeting(request: MeetingCreate, current_user: dict = Depends(require_auth)):
+def _cached_response(content: dict, etag: str) -> ORJSONResponse:
+    return ORJSONResponse(content, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+@router.post("", responses=MEETING_DETAIL_DOC, summary="创建新会议")
+async def create_meeting(request: MeetingCreate, current_user: CurrentUser):
     """创建新会议（需要登录）"""
     meeting = await meeting_service.create_meeting(
         name=request.name,
@@ -69,11 +85,11 @@ async def create_meeting(request: MeetingCreate, current_user: dict = Depends(re
         user_id=current_user["user_id"],
         hotwords=request.hotwords
     )
-    return meeting
+    return _meeting_detail(meeting)
 
 
-@router.get("", response_model=List[MeetingListItem], summary="获取会议列表")
-async def list_meetings(limit: int = 20, offset: int = 0, current_user: dict = Depends(get_current_user)):
+@router.get("", responses=MEETING_LIST_DOC, summary="获取会议列表")
+async def list_meetings(current_user: OptionalUser, limit: int = 20, offset: int = 0):
     """获取会议列表"""
     user_id = current_user["user_id"] if current_user else None
 
@@ -85,39 +101,75 @@ async def list_meetings(limit: int = 20, offset: int = 0, current_user: dict = D
     return meetings
 
 
-@router.get("/{meeting_id}", response_model=MeetingResponse, summary="获取会议详情")
-async def get_meeting(meeting_id: str):
-    """获取会议详情"""
+@router.get("/search", summary="搜索会议")
+async def search_meetings(query: str, current_user: OptionalUser, limit: int = 10):
+    """搜索会议记录"""
+    user_id = current_user["user_id"] if current_user else None
+
+    results = await meeting_service.search_transcripts(query, limit=limit, user_id=user_id)
+    return results
+
+
+@router.get("/{meeting_id}", responses=MEETING_DETAIL_DOC, summary="获取会议详情")
+async def get_meeting(meeting_id: str, request: Request):
+    """获取会议详情（支持 ETag 条件请求）"""
+    not_modified = await _check_not_modified(request, meeting_id)
+    if not_modified:
+        return not_modified
+
     meeting = await meeting_service.get_meeting(meeting_id)
     if not meeting:
         raise HTTPException(status_code=404, detail="Meeting not found")
-    return meeting
+    return _cached_response(_meeting_detail(meeting), _make_etag(meeting_id, meeting["updated_at"]))
 
 
 @router.post("/{meeting_id}/transcript", summary="更新会议转写")
-async def update_transcript(meeting_id: str, data: dict):
-    """更新会议转写文本"""
-    meeting = await meeting_service.update_transcript(
+async def update_transcript(meeting_id: str, request: Request):
+    """更新会议转写文本（请求体可用 zstd 压缩）"""
+    data = await read_json_body(request, allow_zstd=True)
+    # 排队合并写入，读取会议时会先落盘
+    queued = await meeting_service.append_transcript(
         meeting_id=meeting_id,
         text=data.get("text", ""),
         segment=data.get("segment")
     )
-    if not meeting:
+    if not queued:
         raise HTTPException(status_code=404, detail="Meeting not found")
     return {"success": True}
 
 
-@router.post("/{meeting_id}/end", response_model=MeetingResponse, summary="结束会议")
+@router.post("/{meeting_id}/end", responses=MEETING_DETAIL_DOC, summary="结束会议")
 async def end_meeting(meeting_id: str):
     """结束会议"""
     meeting = await meeting_service.end_meeting(meeting_id)
     if not meeting:
         raise HTTPException(status_code=404, detail="Meeting not found")
-    return meeting
+
+    if meeting.get("transcript") and not meeting.get("summary"):
+        task = asyncio.create_task(_compute_and_store_summary(meeting_id, meeting["transcript"]))
+        _summary_tasks.add(task)
+        task.add_done_callback(_summary_tasks.discard)
+
+    return _meeting_detail(meeting)
+
+
+async def _compute_and_store_summary(meeting_id: str, transcript: str) -> None:
+    """后台生成并保存会议总结"""
+    try:
+        result = await LLMService.summarize(text=transcript, options=AUTO_SUMMARY_OPTIONS)
+        await meeting_service.save_summary(
+            meeting_id,
+            summary=result.get('summary', ''),
+            key_points=result.get('key_points', []),
+            todos=result.get('todos', []),
+            decisions=result.get('decisions', [])
+        )
+    except Exception as exc:
+        logger.warning("会议 %s 自动总结失败: %s", meeting_id, exc)
 
 
 @router.delete("/{meeting_id}", summary="删除会议")
-async def delete_meeting(meeting_id: str, current_user: dict = Depends(require_auth)):
+async def delete_meeting(meeting_id: str, current_user: CurrentUser):
     """删除会议（仅允许删除自己的会议）"""
     meeting = await meeting_service.get_meeting(meeting_id)
     if not meeting:
@@ -134,33 +186,34 @@ async def delete_meeting(meeting_id: str, current_user: dict = Depends(require_a
 
 
 @router.get("/{meeting_id}/transcript", summary="获取会议转写")
-async def get_transcript(meeting_id: str):
-    """获取会议完整转写"""
+async def get_transcript(meeting_id: str, request: Request):
+    """获取会议完整转写（支持 ETag 条件请求）"""
+    not_modified = await _check_not_modified(request, meeting_id)
+    if not_modified:
+        return not_modified
+
     meeting = await meeting_service.get_meeting(meeting_id)
     if not meeting:
         raise HTTPException(status_code=404, detail="Meeting not found")
-    return {
+    return _cached_response({
         "id": meeting["id"],
         "name": meeting["name"],
         "transcript": meeting.get("transcript", ""),
         "segments": meeting.get("transcript_segments", []),
         "duration": meeting.get("duration", 0)
-    }
+    }, _make_etag(meeting_id, meeting["updated_at"]))
 
 
 @router.get("/{meeting_id}/summary", summary="获取会议总结")
-async def get_summary(meeting_id: str):
-    """获取会议总结"""
-    meeting = await meeting_service.get_meeting(meeting_id)
-    if not meeting:
+async def get_summary(meeting_id: str, request: Request):
+    """获取会议总结（直接返回索引中已序列化的 JSON，不读取会议文件；支持 ETag）"""
+    found = await meeting_service.get_summary_payload(meeting_id)
+    if found is None:
         raise HTTPException(status_code=404, detail="Meeting not found")
-    return meeting.get("summary", {})
-
 
-@router.get("/search", summary="搜索会议")
-async def search_meetings(query: str, limit: int = 10, current_user: dict = Depends(get_current_user)):
-    """搜索会议记录"""
-    user_id = current_user["user_id"] if current_user else None
-
-    results = await meeting_service.search_transcripts(query, limit=limit, user_id=user_id)
-    return results
+    payload, updated_at = found
+    etag = _make_etag(meeting_id, updated_at)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload, media_type="application/json", headers=headers)
@@ -8,15 +8,24 @@ import json
 import logging
 import os
 import shutil
+import sqlite3
+import threading
 import uuid
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, AsyncIterator, BinaryIO, Dict, List, Optional, Set, Tuple
+
+import orjson
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks, Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
+from starlette.datastructures import UploadFile as StarletteUploadFile
 
 from ..config import config
+from .deps import read_json_body
 
 router = APIRouter(prefix="/offline", tags=["离线上传"])
 logger = logging.getLogger(__name__)
@@ -26,14 +35,253 @@ PROJECT_ROOT = Path(__file__).resolve().parents[2]
 UPLOAD_DIR = Path(config.get('storage.upload_dir', 'data/uploads'))
 TEMP_DIR = Path(config.get('storage.temp_dir', 'data/temp'))
 MAX_FILE_SIZE = 2 * 1024 * 1024 * 1024  # 2GB
+CHUNK_WRITE_CONCURRENCY = 8  # 批量上传时同时写盘的分片数
+STREAM_WRITE_BLOCK = 1024 * 1024  # 流式接收分片时每次写盘的数据量
+CHUNK_HASH_ALGORITHM = "blake2b-64"  # 分片内容哈希算法（返回给客户端比对用）
+JOB_RETENTION_SECONDS = 24 * 3600  # 已结束任务在内存中保留的时间
+UPLOAD_SESSION_TTL_SECONDS = 24 * 3600  # 超过该时间没有新分片的上传会话连同目标文件一起清理
+MAX_PARALLEL_RECOGNITIONS = max(1, int(config.get('offline.max_parallel', 1) or 1))  # 同时识别的任务数
 
 # 用于按标点切句的标点集合
-SENTENCE_PUNCTUATION = set("。！？!?；;\n")
+SENTENCE_PUNCTUATION = frozenset("。！？!?；;\n")
+# 不消耗字级 timestamp 的字符：标点（空白另行判断）
+NON_SPEECH_CHARS = SENTENCE_PUNCTUATION | frozenset("，,、：:""''\"'()（）【】[]《》<>—…·")
+
+# 字符类别查找表中的取值
+CHAR_SPEECH, CHAR_NON_SPEECH, CHAR_SENTENCE_END = 0, 1, 2
+
+
+@lru_cache(maxsize=1)
+def _char_class_table():
+    """BMP 码点 -> 字符类别的查找表，首次使用时构建一次（BMP 以外的字符均视为语音字符）"""
+    import numpy as np
+
+    table = np.full(0x10000, CHAR_SPEECH, dtype=np.uint8)
+    table[[ord(ch) for ch in NON_SPEECH_CHARS]] = CHAR_NON_SPEECH
+    # 所有空白字符都在 U+3000 以内
+    table[[code for code in range(0x3001) if chr(code).isspace()]] = CHAR_NON_SPEECH
+    table[[ord(ch) for ch in SENTENCE_PUNCTUATION]] = CHAR_SENTENCE_END
+    table[0xFFFF] = CHAR_SPEECH  # BMP 以外的码点截断到此处
+    return table
+
 
 # 确保目录存在
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 TEMP_DIR.mkdir(parents=True, exist_ok=True)
 
+# 上传会话持久化（服务重启后可继续上传）
+UPLOAD_SESSIONS_DB = UPLOAD_DIR / 'upload_sessions.db'
+
+
+def _create_sparse_file(path: Path, size: int) -> None:
+    """创建目标文件并设置长度（稀疏文件，只有实际写入的分片占用磁盘）"""
+    with open(path, 'wb') as f:
+        f.truncate(size)
+
+
+def _write_at(path: Path, offset: int, content: bytes) -> None:
+    """在文件指定偏移写入数据（不同分片写入互不重叠，可并发执行）"""
+    if hasattr(os, 'pwrite'):
+        fd = os.open(path, os.O_WRONLY)
+        try:
+            view = memoryview(content)
+            while view:
+                written = os.pwrite(fd, view, offset)
+                view = view[written:]
+                offset += written
+        finally:
+            os.close(fd)
+    else:
+        with open(path, 'r+b') as f:
+            f.seek(offset)
+            f.write(content)
+
+
+def _chunk_hasher():
+    """分片内容哈希（64 位 BLAKE2b，仅用于完整性校验和续传比对）"""
+    return hashlib.blake2b(digest_size=8)
+
+
+def _write_hashed(path: Path, offset: int, blocks: List[bytes], hasher) -> None:
+    """合并数据块写入目标文件 offset 处，同时更新哈希"""
+    data = b"".join(blocks)
+    hasher.update(data)
+    _write_at(path, offset, data)
+
+
+def _copy_into(path: Path, offset: int, max_size: int, source: BinaryIO) -> Tuple[int, str]:
+    """
+    把文件对象内容按块写入目标文件 offset 处，返回 (写入字节数, 内容哈希)
+    超过 max_size 时抛出 ValueError
+    """
+    written = 0
+    hasher = _chunk_hasher()
+    with open(path, 'r+b') as dest:
+        dest.seek(offset)
+        while block := source.read(STREAM_WRITE_BLOCK):
+            written += len(block)
+            if written > max_size:
+                raise ValueError("chunk exceeds its range")
+            hasher.update(block)
+            dest.write(block)
+    return written, hasher.hexdigest()
+
+
+def _bitmap_test(bitmap: bytearray, index: int) -> bool:
+    return bool(bitmap[index >> 3] & (1 << (index & 7)))
+
+
+def _bitmap_set(bitmap: bytearray, index: int) -> None:
+    bitmap[index >> 3] |= 1 << (index & 7)
+
+
+def _bitmap_count(bitmap: bytearray) -> int:
+    return int.from_bytes(bitmap, 'little').bit_count()
+
+
+def _bitmap_indexes(bitmap: bytearray) -> List[int]:
+    """位图中已置位的序号（升序）"""
+    return [
+        (byte_index << 3) + bit
+        for byte_index, byte in enumerate(bitmap) if byte
+        for bit in range(8) if byte & (1 << bit)
+    ]
+
+
+def _open_sessions_db() -> sqlite3.Connection:
+    """打开上传会话库（每个会话一行，data 为 JSON，version 防止并发写入时旧状态覆盖新状态）"""
+    conn = sqlite3.connect(UPLOAD_SESSIONS_DB, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    with conn:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS upload_sessions ("
+            "upload_id TEXT PRIMARY KEY, version INTEGER NOT NULL, data BLOB NOT NULL)"
+        )
+    return conn
+
+
+def _session_to_json(session: dict) -> bytes:
+    return orjson.dumps(
+        {
+            **session,
+            "uploaded_chunks": session["uploaded_chunks"].hex(),
+            "output_path": str(session["output_path"]),
+        },
+        option=orjson.OPT_NON_STR_KEYS
+    )
+
+
+def _session_from_json(data: bytes) -> dict:
+    session = orjson.loads(data)
+    session["uploaded_chunks"] = bytearray.fromhex(session["uploaded_chunks"])
+    session["output_path"] = Path(session["output_path"])
+    session["chunk_hashes"] = {int(index): digest for index, digest in session["chunk_hashes"].items()}
+    return session
+
+
+def _session_last_active(session: dict) -> float:
+    """会话最后一次写入分片（或创建）的时间戳"""
+    return datetime.fromisoformat(session.get("updated_at") or session["created_at"]).timestamp()
+
+
+def _discard_upload_files(sessions: List[dict]) -> None:
+    """删除过期上传会话的目标文件"""
+    for session in sessions:
+        try:
+            session["output_path"].unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning("删除过期上传文件失败: %s", e)
+
+
+def _parse_timestamp_pair(item: Any) -> Optional[Tuple[float, float]]:
+    """解析单个 [start, end] 时间戳，格式不对返回 None"""
+    if not isinstance(item, (list, tuple)) or len(item) < 2:
+        return None
+    try:
+        return float(item[0]), float(item[1])
+    except (TypeError, ValueError):
+        return None
+
+
+# 模型引用 -> 已解析的本地目录
+_resolved_model_paths: Dict[str, Path] = {}
+
+
+@lru_cache(maxsize=1)
+def _model_search_roots() -> Tuple[Path, ...]:
+    """离线模型搜索路径（源码和 Docker 共用，配置在进程内不变，只计算一次）"""
+    roots: List[Path] = []
+    seen: Set[str] = set()
+
+    def add_root(path_like: Optional[str]) -> None:
+        if not path_like:
+            return
+        path_obj = Path(path_like).expanduser()
+        if not path_obj.is_absolute():
+            path_obj = (PROJECT_ROOT / path_obj).resolve()
+        else:
+            path_obj = path_obj.resolve()
+        path_key = str(path_obj)
+        if path_key not in seen:
+            seen.add(path_key)
+            roots.append(path_obj)
+
+    modelscope_cache = os.environ.get("MODELSCOPE_CACHE")
+    if not modelscope_cache:
+        modelscope_cache = str(PROJECT_ROOT / "data" / "modelscope_cache")
+
+    add_root(str(PROJECT_ROOT / "data" / "models"))
+    add_root(str(Path(modelscope_cache) / "models"))
+
+    extra_roots = config.get("offline.model_search_paths", [])
+    if isinstance(extra_roots, str):
+        extra_roots = [p.strip() for p in extra_roots.split(",") if p.strip()]
+    if isinstance(extra_roots, list):
+        for root in extra_roots:
+            add_root(str(root))
+
+    return tuple(roots)
+
+
+def _resolve_local_model_path(model_ref: str) -> Optional[Path]:
+    """将模型引用解析到本地目录（只缓存找到的结果，缺失的模型放入后无需重启）"""
+    ref = str(model_ref or "").strip()
+    if not ref:
+        return None
+
+    cached = _resolved_model_paths.get(ref)
+    if cached is not None:
+        return cached
+
+    resolved = _find_local_model_path(ref)
+    if resolved is not None:
+        _resolved_model_paths[ref] = resolved
+    return resolved
+
+
+def _find_local_model_path(ref: str) -> Optional[Path]:
+    """按绝对路径、当前目录、项目目录、模型搜索路径的顺序查找模型目录"""
+    direct_path = Path(ref).expanduser()
+    if direct_path.is_absolute() and direct_path.exists():
+        return direct_path.resolve()
+
+    if not direct_path.is_absolute():
+        cwd_path = (Path.cwd() / direct_path).resolve()
+        if cwd_path.exists():
+            return cwd_path
+
+        project_path = (PROJECT_ROOT / direct_path).resolve()
+        if project_path.exists():
+            return project_path
+
+    for root in _model_search_roots():
+        candidate = (root / ref).resolve()
+        if candidate.exists():
+            return candidate
+
+    return None
+
 
 class JobStatus(str, Enum):
     """任务状态"""
@@ -46,29 +294,30 @@ class JobStatus(str, Enum):
     CANCELED = "canceled"
 
 
+@dataclass(slots=True)
 class OfflineJob:
     """离线识别任务"""
-    def __init__(
-        self,
-        job_id: str,
-        meeting_id: str,
-        file_name: str,
-        file_path: str,
-        compute_device: str = "gpu"
-    ):
-        self.id = job_id
-        self.meeting_id = meeting_id
-        self.file_name = file_name
-        self.file_path = file_path
-        self.compute_device = (compute_device or "gpu").lower()
-        self.status = JobStatus.UPLOADING
-        self.status_text = "等待上传"
-        self.created_at = datetime.now()
-        self.updated_at = datetime.now()
-        self.upload_percent = 0
-        self.recognition_percent = 0
-        self.error = None
-        self.result = None
+    id: str
+    meeting_id: str
+    file_name: str
+    file_path: str
+    compute_device: str = "gpu"
+    status: JobStatus = JobStatus.UPLOADING
+    status_text: str = "等待上传"
+    created_at: datetime = field(default_factory=datetime.now)
+    updated_at: datetime = field(default_factory=datetime.now)
+    upload_percent: float = 0
+    recognition_percent: float = 0
+    error: Optional[str] = None
+    result: Optional[dict] = None
+    result_in_meeting: bool = False  # 全文和分段已保存到会议记录，result 中只保留其余字段
+
+    def __post_init__(self):
+        self.compute_device = (self.compute_device or "gpu").lower()
+
+
+# 已结束的任务状态，超过保留时间后从内存中清理
+FINISHED_JOB_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELED)
 
 
 class OfflineManager:
@@ -80,9 +329,89 @@ class OfflineManager:
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._instance._jobs: Dict[str, OfflineJob] = {}
-            cls._instance._upload_sessions: Dict[str, dict] = {}
+            cls._instance._sessions_lock = threading.Lock()
+            cls._instance._sessions_db = _open_sessions_db()
+            cls._instance._upload_sessions: Dict[str, dict] = cls._instance._load_upload_sessions()
+            cls._instance._hotword_cache: Optional[Tuple[Tuple[int, int], str]] = None
+            cls._instance._asr_model_cache: Dict[Tuple[str, ...], Any] = {}
+            # 每个已加载模型一把锁：FunASR AutoModel 不保证可重入，同一模型的 generate 依次执行
+            cls._instance._asr_model_locks: Dict[Tuple[str, ...], asyncio.Lock] = {}
+            cls._instance._asr_load_lock = asyncio.Lock()
+            cls._instance._device_cache: Dict[str, Tuple[str, Optional[str]]] = {}
+            cls._instance._recognition_semaphore = asyncio.Semaphore(MAX_PARALLEL_RECOGNITIONS)
         return cls._instance
 
+    def _load_upload_sessions(self) -> Dict[str, dict]:
+        """启动时从会话库恢复未完成的上传（目标文件已不存在或已过期的会话直接丢弃）"""
+        sessions: Dict[str, dict] = {}
+        stale: List[str] = []
+        expired: List[dict] = []
+        cutoff = datetime.now().timestamp() - UPLOAD_SESSION_TTL_SECONDS
+        with self._sessions_lock:
+            for upload_id, data in self._sessions_db.execute("SELECT upload_id, data FROM upload_sessions"):
+                try:
+                    session = _session_from_json(data)
+                    last_active = _session_last_active(session)
+                except (orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+                    stale.append(upload_id)
+                    continue
+                if last_active < cutoff:
+                    expired.append(session)
+                    stale.append(upload_id)
+                elif session["output_path"].exists():
+                    sessions[upload_id] = session
+                else:
+                    stale.append(upload_id)
+            if stale:
+                with self._sessions_db:
+                    self._sessions_db.executemany(
+                        "DELETE FROM upload_sessions WHERE upload_id = ?", [(upload_id,) for upload_id in stale]
+                    )
+        _discard_upload_files(expired)
+        if sessions:
+            logger.info("恢复未完成的上传会话: %d 个", len(sessions))
+        return sessions
+
+    async def _prune_upload_sessions(self) -> None:
+        """清理超过 UPLOAD_SESSION_TTL_SECONDS 没有新分片的上传会话及其目标文件"""
+        cutoff = datetime.now().timestamp() - UPLOAD_SESSION_TTL_SECONDS
+        expired = [
+            session for session in self._upload_sessions.values()
+            if _session_last_active(session) < cutoff
+        ]
+        if not expired:
+            return
+        for session in expired:
+            del self._upload_sessions[session["upload_id"]]
+        await run_in_threadpool(self._discard_sessions, expired)
+
+    def _discard_sessions(self, sessions: List[dict]) -> None:
+        with self._sessions_lock, self._sessions_db:
+            self._sessions_db.executemany(
+                "DELETE FROM upload_sessions WHERE upload_id = ?", [(session["upload_id"],) for session in sessions]
+            )
+        _discard_upload_files(sessions)
+
+    async def _persist_session(self, session: dict) -> None:
+        """保存会话状态（在事件循环中序列化当前状态，写库放入线程池）"""
+        session["version"] = session.get("version", 0) + 1
+        session["updated_at"] = datetime.now().isoformat()
+        data = _session_to_json(session)
+        await run_in_threadpool(self._write_session_row, session["upload_id"], session["version"], data)
+
+    def _write_session_row(self, upload_id: str, version: int, data: bytes) -> None:
+        with self._sessions_lock, self._sessions_db:
+            self._sessions_db.execute(
+                "INSERT INTO upload_sessions VALUES (?, ?, ?) "
+                "ON CONFLICT(upload_id) DO UPDATE SET version = excluded.version, data = excluded.data "
+                "WHERE excluded.version > upload_sessions.version",
+                (upload_id, version, data)
+            )
+
+    def _delete_session_row(self, upload_id: str) -> None:
+        with self._sessions_lock, self._sessions_db:
+            self._sessions_db.execute("DELETE FROM upload_sessions WHERE upload_id = ?", (upload_id,))
+
     async def create_upload_session(
         self,
         meeting_id: str,
@@ -95,6 +424,7 @@ class OfflineManager:
         compute_device: str = "gpu"
     ) -> dict:
         """创建上传会话"""
+        await self._prune_upload_sessions()
         async with self._lock:
             upload_id = str(uuid.uuid4())
             compute_device = str(compute_device or "gpu").lower()
@@ -120,8 +450,13 @@ class OfflineManager:
                     detail="不支持的文件类型，请上传有效的音频文件"
                 )
 
+            # 提前确定任务 ID，分片直接写入最终文件，完成时不再合并
+            job_id = str(uuid.uuid4())
+            total_chunks = (file_size + chunk_size - 1) // chunk_size
             session = {
                 "upload_id": upload_id,
+                "job_id": job_id,
+                "output_path": UPLOAD_DIR / f"{job_id}_{file_name}",
                 "meeting_id": meeting_id,
                 "file_name": file_name,
                 "file_size": file_size,
@@ -130,64 +465,154 @@ class OfflineManager:
                 "mode": mode,
                 "hotwords": hotwords or {},
                 "compute_device": compute_device,
-                "uploaded_chunks": set(),
-                "total_chunks": (file_size + chunk_size - 1) // chunk_size,
+                "uploaded_chunks": bytearray((total_chunks + 7) >> 3),  # 已上传分片位图
+                "uploaded_bytes": 0,
+                "chunk_hashes": {},
+                "total_chunks": total_chunks,
                 "created_at": datetime.now().isoformat()
             }
 
-            # 创建临时目录
-            session_dir = TEMP_DIR / upload_id
-            session_dir.mkdir(exist_ok=True)
+        # 创建目标文件（在线程池中执行，不占用会话锁）；不预分配空间，磁盘只随实际上传的分片增长
+        await run_in_threadpool(_create_sparse_file, session["output_path"], file_size)
+        await self._persist_session(session)
+        self._upload_sessions[upload_id] = session
 
-            self._upload_sessions[upload_id] = session
+        return {
+            "upload_id": upload_id,
+            "chunk_size": chunk_size,
+            "total_chunks": session["total_chunks"],
+            "uploaded_chunks": _bitmap_indexes(session["uploaded_chunks"]),
+            "compute_device": compute_device,
+            "max_parallel": 3,
+            "max_parallel_recognitions": MAX_PARALLEL_RECOGNITIONS
+        }
 
-            return {
-                "upload_id": upload_id,
-                "chunk_size": chunk_size,
-                "total_chunks": session["total_chunks"],
-                "uploaded_chunks": list(session["uploaded_chunks"]),
-                "compute_device": compute_device,
-                "max_parallel": 3
-            }
+    async def upload_chunks(self, upload_id: str, chunks: List[Tuple[int, BinaryIO]]) -> dict:
+        """批量上传分片（分片为已落盘的临时文件），磁盘写入并发执行（最多 CHUNK_WRITE_CONCURRENCY 个）"""
+        if upload_id not in self._upload_sessions:
+            raise HTTPException(status_code=404, detail="上传会话不存在")
+
+        session = self._upload_sessions[upload_id]
+        # 先校验全部分片序号，避免部分分片已开始写入后才报错
+        for index, _ in chunks:
+            self._chunk_range(session, index)
+
+        semaphore = asyncio.Semaphore(CHUNK_WRITE_CONCURRENCY)
+
+        async def store(chunk_index: int, source: BinaryIO) -> None:
+            async with semaphore:
+                await self._store_chunk_file(session, chunk_index, source)
+
+        # 等待所有拷贝结束后再抛出首个错误，确保调用方关闭临时文件时没有拷贝仍在进行
+        results = await asyncio.gather(
+            *(store(index, source) for index, source in chunks), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+        return {
+            "chunk_indexes": sorted(index for index, _ in chunks),
+            "hashes": {str(index): session["chunk_hashes"][index] for index, _ in chunks},
+            "uploaded_bytes": session["uploaded_bytes"],
+            "total_bytes": session["file_size"],
+            "percent": session["upload_percent"]
+        }
 
-    async def upload_chunk(
+    async def upload_chunk_stream(
         self,
         upload_id: str,
         chunk_index: int,
-        content: bytes
+        stream: AsyncIterator[bytes]
     ) -> dict:
-        """上传分片"""
+        """边接收边写入分片，不在内存中保留整个分片"""
         if upload_id not in self._upload_sessions:
             raise HTTPException(status_code=404, detail="上传会话不存在")
 
         session = self._upload_sessions[upload_id]
+        start, limit = self._chunk_range(session, chunk_index)
+
+        offset = start
+        blocks: List[bytes] = []
+        buffered = 0
+        hasher = _chunk_hasher()
+        async for block in stream:
+            if offset + buffered + len(block) > limit:
+                raise HTTPException(status_code=400, detail=f"分片 {chunk_index} 大小超出范围")
+            blocks.append(block)
+            buffered += len(block)
+            # 攒够一批再写，减少线程切换
+            if buffered >= STREAM_WRITE_BLOCK:
+                await run_in_threadpool(_write_hashed, session["output_path"], offset, blocks, hasher)
+                offset += buffered
+                blocks, buffered = [], 0
+        if buffered:
+            await run_in_threadpool(_write_hashed, session["output_path"], offset, blocks, hasher)
+            offset += buffered
+
+        digest = hasher.hexdigest()
+        self._record_chunk(session, chunk_index, offset - start, limit - start, digest)
+        await self._persist_session(session)
 
-        # 写入分片文件
-        chunk_path = TEMP_DIR / upload_id / f"chunk_{chunk_index:06d}"
-        with open(chunk_path, 'wb') as f:
-            f.write(content)
+        return {
+            "chunk_index": chunk_index,
+            "hash": digest,
+            "uploaded_bytes": session["uploaded_bytes"],
+            "total_bytes": session["file_size"],
+            "percent": session["upload_percent"]
+        }
 
-        session["uploaded_chunks"].add(chunk_index)
+    def _chunk_range(self, session: dict, chunk_index: int) -> Tuple[int, int]:
+        """分片在目标文件中的 [起始偏移, 最大结束偏移)"""
+        if not 0 <= chunk_index < session["total_chunks"]:
+            raise HTTPException(status_code=400, detail=f"无效的分片序号: {chunk_index}")
+        start = chunk_index * session["chunk_size"]
+        return start, min(start + session["chunk_size"], session["file_size"])
+
+    async def _store_chunk_file(self, session: dict, chunk_index: int, source: BinaryIO) -> None:
+        """把分片文件按块拷贝到目标文件对应偏移并更新会话进度"""
+        start, limit = self._chunk_range(session, chunk_index)
+        try:
+            # 在线程池中拷贝，不阻塞事件循环，也不把整个分片读入内存
+            size, digest = await run_in_threadpool(
+                _copy_into, session["output_path"], start, limit - start, source
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"分片 {chunk_index} 大小超出范围")
+        self._record_chunk(session, chunk_index, size, limit - start, digest)
+        await self._persist_session(session)
+
+    def _record_chunk(self, session: dict, chunk_index: int, size: int, expected: int, digest: str) -> None:
+        """记录已写入的分片及其内容哈希，并更新上传进度（分片必须填满其范围）"""
+        if size != expected:
+            raise HTTPException(
+                status_code=400,
+                detail=f"分片 {chunk_index} 大小不完整: 收到 {size} 字节，应为 {expected} 字节"
+            )
+        session["chunk_hashes"][chunk_index] = digest
 
-        uploaded_bytes = sum(
-            (chunk_index + 1) * session["chunk_size"]
-            if i == len(session["uploaded_chunks"]) - 1
-            else session["chunk_size"]
-            for i, chunk_index in enumerate(sorted(session["uploaded_chunks"]))
-        ) - session["chunk_size"] + len(content)
+        # 累计已上传字节数（重传的分片不重复计数）
+        if not _bitmap_test(session["uploaded_chunks"], chunk_index):
+            _bitmap_set(session["uploaded_chunks"], chunk_index)
+            session["uploaded_bytes"] += size
 
         # 更新上传进度
-        session["upload_percent"] = min(100, (uploaded_bytes / session["file_size"]) * 100)
+        session["upload_percent"] = min(100, (session["uploaded_bytes"] / session["file_size"]) * 100) if session["file_size"] else 100
+
+    async def get_chunk_hashes(self, upload_id: str) -> dict:
+        """获取已上传分片的内容哈希，断点续传时客户端可比对后跳过相同分片"""
+        if upload_id not in self._upload_sessions:
+            raise HTTPException(status_code=404, detail="上传会话不存在")
 
+        session = self._upload_sessions[upload_id]
         return {
-            "chunk_index": chunk_index,
-            "uploaded_bytes": uploaded_bytes,
-            "total_bytes": session["file_size"],
-            "percent": session["upload_percent"]
+            "upload_id": upload_id,
+            "algorithm": CHUNK_HASH_ALGORITHM,
+            "hashes": {str(index): digest for index, digest in sorted(session["chunk_hashes"].items())}
         }
 
     async def complete_upload(self, upload_id: str, meeting_id: str) -> dict:
-        """完成上传，合并文件"""
+        """完成上传，创建识别任务"""
         if upload_id not in self._upload_sessions:
             raise HTTPException(status_code=404, detail="上传会话不存在")
 
@@ -195,36 +620,26 @@ class OfflineManager:
 
         # 检查是否所有分片都已上传
         expected_chunks = session["total_chunks"]
-        uploaded = len(session["uploaded_chunks"])
+        uploaded = _bitmap_count(session["uploaded_chunks"])
 
         if uploaded < expected_chunks:
             raise HTTPException(
                 status_code=400,
                 detail=f"分片不完整: 已上传 {uploaded}/{expected_chunks} 个分片"
             )
+        if session["uploaded_bytes"] != session["file_size"]:
+            raise HTTPException(
+                status_code=400,
+                detail=f"文件不完整: 已上传 {session['uploaded_bytes']}/{session['file_size']} 字节"
+            )
 
-        # 合并文件
-        job_id = str(uuid.uuid4())
-        output_path = UPLOAD_DIR / f"{job_id}_{session['file_name']}"
-
-        try:
-            with open(output_path, 'wb') as outfile:
-                for i in range(expected_chunks):
-                    chunk_path = TEMP_DIR / upload_id / f"chunk_{i:06d}"
-                    if chunk_path.exists():
-                        with open(chunk_path, 'rb') as infile:
-                            outfile.write(infile.read())
-                        chunk_path.unlink()  # 删除分片
-
-            # 删除临时目录
-            (TEMP_DIR / upload_id).rmdir()
-
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"文件合并失败: {str(e)}")
+        # 分片已写入目标文件，无需合并
+        job_id = session["job_id"]
+        output_path = session["output_path"]
 
         # 创建任务
         job = OfflineJob(
-            job_id=job_id,
+            id=job_id,
             meeting_id=meeting_id,
             file_name=session['file_name'],
             file_path=str(output_path),
@@ -233,8 +648,10 @@ class OfflineManager:
         job.status = JobStatus.QUEUED
         job.status_text = "等待识别"
 
+        self._prune_jobs()
         self._jobs[job_id] = job
         del self._upload_sessions[upload_id]
+        await run_in_threadpool(self._delete_session_row, upload_id)
 
         # 启动后台识别任务
         asyncio.create_task(self._run_recognition(job))
@@ -246,17 +663,21 @@ class OfflineManager:
         }
 
     async def _run_recognition(self, job: OfflineJob):
-        """运行离线识别任务"""
+        """运行离线识别任务（同时识别的任务数受 offline.max_parallel 限制，其余保持排队状态）"""
+        async with self._recognition_semaphore:
+            # 排队期间可能已被取消
+            if job.status == JobStatus.CANCELED:
+                return
+            await self._recognize_job(job)
+
+    async def _recognize_job(self, job: OfflineJob):
+        """执行识别并更新任务状态"""
         try:
             # 更新状态
             job.status = JobStatus.RECOGNIZING
             job.status_text = "识别中"
             job.updated_at = datetime.now()
 
-            # 检查是否已取消
-            if job.status == JobStatus.CANCELED:
-                return
-
             # 调用实际的 ASR 识别
             success = await self._recognize_audio(job)
 
@@ -307,11 +728,11 @@ class OfflineManager:
                 'offline.punc_model_id',
                 'iic/punc_ct-transformer_zh-cn-common-vocab272727-pytorch'
             )
-            model_path = self._resolve_local_model_path(model_ref)
-            vad_model_path = self._resolve_local_model_path(vad_model_ref)
-            punc_model_path = self._resolve_local_model_path(punc_model_ref)
+            model_path = _resolve_local_model_path(model_ref)
+            vad_model_path = _resolve_local_model_path(vad_model_ref)
+            punc_model_path = _resolve_local_model_path(punc_model_ref)
             if not (model_path and vad_model_path and punc_model_path):
-                search_roots = ", ".join(str(p) for p in self._model_search_roots())
+                search_roots = ", ".join(str(p) for p in _model_search_roots())
                 missing_parts = []
                 if not model_path:
                     missing_parts.append(f"model={model_ref}")
@@ -345,12 +766,20 @@ class OfflineManager:
             )
             model_kwargs["device"] = device
 
-            # 加载模型，兼容旧版 FunASR 参数差异
-            asr_model, init_error = self._init_asr_model(AutoModel, model_kwargs, device)
-
-            if asr_model is None:
-                job.error = init_error or "ASR 模型加载失败"
-                return False
+            # 加载模型（同一设备和模型路径只加载一次，后续任务复用）
+            cache_key = (device, str(model_path), str(vad_model_path), str(punc_model_path))
+            async with self._asr_load_lock:
+                asr_model = self._asr_model_cache.get(cache_key)
+                if asr_model is None:
+                    # 兼容旧版 FunASR 参数差异
+                    asr_model, init_error = await run_in_threadpool(
+                        self._init_asr_model, AutoModel, model_kwargs, device
+                    )
+                    if asr_model is None:
+                        job.error = init_error or "ASR 模型加载失败"
+                        return False
+                    self._asr_model_cache[cache_key] = asr_model
+                    self._asr_model_locks[cache_key] = asyncio.Lock()
 
             # 检查是否已取消
             if job.status == JobStatus.CANCELED:
@@ -363,24 +792,30 @@ class OfflineManager:
                 hotword=self._get_hotwords(job.meeting_id),
                 sentence_timestamp=True,
             )
-            result = asr_model.generate(**generate_kwargs)
+            # 识别耗时可达数分钟，放入线程池执行，不阻塞状态查询和上传请求；
+            # offline.max_parallel > 1 时不同模型/设备的任务可并行，共用同一模型的任务在此排队
+            async with self._asr_model_locks[cache_key]:
+                if job.status == JobStatus.CANCELED:
+                    return False
+                result = await run_in_threadpool(asr_model.generate, **generate_kwargs)
 
             # 检查是否已取消
             if job.status == JobStatus.CANCELED:
                 return False
 
             # 解析结果
-            if result and len(result) > 0:
+            if result:
                 first = result[0] if isinstance(result[0], dict) else {}
+                # FunASR 的 text 通常为字符串，非字符串时统一转换
                 text = str(first.get('text', '') or '').strip()
-                segments = self._build_segments(first)
+                segments = self._build_segments(first, text)
 
                 # 兜底：至少保留全文
                 if not segments and text:
                     segments = [{"text": text, "start_time": 0.0, "end_time": 0.0}]
 
                 # 保存结果
-                job.result = {
+                result = {
                     'full_text': text,
                     'segments': segments,
                     'summary': None,
@@ -390,11 +825,17 @@ class OfflineManager:
                 }
 
                 from ..services.meeting_service import meeting_service
-                await meeting_service.save_offline_result(
+                saved = await meeting_service.save_offline_result(
                     job.meeting_id,
-                    job.result
+                    result
                 )
 
+                # 全文和分段已写入会议记录，不再随任务常驻内存，查询时从会议读取
+                if saved is not None:
+                    result = {k: v for k, v in result.items() if k not in ('full_text', 'segments')}
+                    job.result_in_meeting = True
+                job.result = result
+
                 return True
 
             job.error = "识别结果为空"
@@ -405,111 +846,58 @@ class OfflineManager:
             logger.exception("离线识别失败: %s", e)
             return False
 
-    def _model_search_roots(self) -> List[Path]:
-        """离线模型搜索路径（源码和 Docker 共用）"""
-        roots: List[Path] = []
-        seen: Set[str] = set()
-
-        def add_root(path_like: Optional[str]) -> None:
-            if not path_like:
-                return
-            path_obj = Path(path_like).expanduser()
-            if not path_obj.is_absolute():
-                path_obj = (PROJECT_ROOT / path_obj).resolve()
-            else:
-                path_obj = path_obj.resolve()
-            path_key = str(path_obj)
-            if path_key not in seen:
-                seen.add(path_key)
-                roots.append(path_obj)
-
-        modelscope_cache = os.environ.get("MODELSCOPE_CACHE")
-        if not modelscope_cache:
-            modelscope_cache = str(PROJECT_ROOT / "data" / "modelscope_cache")
-
-        add_root(str(PROJECT_ROOT / "data" / "models"))
-        add_root(str(Path(modelscope_cache) / "models"))
-
-        extra_roots = config.get("offline.model_search_paths", [])
-        if isinstance(extra_roots, str):
-            extra_roots = [p.strip() for p in extra_roots.split(",") if p.strip()]
-        if isinstance(extra_roots, list):
-            for root in extra_roots:
-                add_root(str(root))
-
-        return roots
-
-    def _resolve_local_model_path(self, model_ref: str) -> Optional[Path]:
-        """将模型引用解析到本地目录"""
-        ref = str(model_ref or "").strip()
-        if not ref:
-            return None
-
-        direct_path = Path(ref).expanduser()
-        if direct_path.is_absolute() and direct_path.exists():
-            return direct_path.resolve()
-
-        if not direct_path.is_absolute():
-            cwd_path = (Path.cwd() / direct_path).resolve()
-            if cwd_path.exists():
-                return cwd_path
-
-            project_path = (PROJECT_ROOT / direct_path).resolve()
-            if project_path.exists():
-                return project_path
-
-        for root in self._model_search_roots():
-            candidate = (root / ref).resolve()
-            if candidate.exists():
-                return candidate
-
-        return None
-
-    def _build_segments(self, result_item: Dict[str, Any]) -> List[dict]:
-        """优先使用 sentence_info；否则用 text+timestamp 按标点切句"""
+    def _build_segments(self, result_item: Dict[str, Any], text: Optional[str] = None) -> List[dict]:
+        """优先使用 sentence_info；否则用 text+timestamp 按标点切句（text 为调用方已提取的全文）"""
         sentence_info = result_item.get("sentence_info")
         if isinstance(sentence_info, list) and sentence_info:
             segments: List[dict] = []
+            append = segments.append
+            timestamp_bounds = self._timestamp_bounds
             for sent in sentence_info:
                 if not isinstance(sent, dict):
                     continue
-                sent_text = str(sent.get("text") or sent.get("sentence") or "").strip()
+                get = sent.get
+                sent_text = str(get("text") or get("sentence") or "").strip()
                 if not sent_text:
                     continue
 
-                ts_pairs = self._normalize_timestamp_pairs(sent.get("timestamp"))
-                if ts_pairs:
-                    start_sec = round(ts_pairs[0][0] / 1000.0, 3)
-                    end_sec = round(ts_pairs[-1][1] / 1000.0, 3)
+                # 只需要首尾时间，不必归一化整句的字级时间戳
+                bounds = timestamp_bounds(get("timestamp"))
+                if bounds:
+                    start_sec = round(bounds[0] / 1000.0, 3)
+                    end_sec = round(bounds[1] / 1000.0, 3)
                 else:
                     # 兼容多种字段名：begin_time/end_time, start/end, start_time/end_time
-                    raw_start = sent.get("begin_time") or sent.get("start") or sent.get("start_time") or 0
-                    raw_end = sent.get("end_time") or sent.get("end") or sent.get("stop") or 0
+                    raw_start = get("begin_time") or get("start") or get("start_time") or 0
+                    raw_end = get("end_time") or get("end") or get("stop") or 0
                     start_sec = round(float(raw_start) / 1000.0, 3) if raw_start else 0.0
                     end_sec = round(float(raw_end) / 1000.0, 3) if raw_end else 0.0
 
-                segments.append({"text": sent_text, "start_time": start_sec, "end_time": end_sec})
+                append({"text": sent_text, "start_time": start_sec, "end_time": end_sec})
             if segments:
                 return segments
 
         # 回退：用 text + 字级 timestamp 按标点切句
-        text = str(result_item.get("text", "") or "").strip()
+        if text is None:
+            text = str(result_item.get("text", "") or "").strip()
         return self._segments_from_text_timestamp(text, result_item.get("timestamp"))
 
     def _normalize_timestamp_pairs(self, raw_timestamps: Any) -> List[Tuple[float, float]]:
         """将各种格式的时间戳归一化为 [(start, end), ...] 列表"""
-        pairs: List[Tuple[float, float]] = []
         if not isinstance(raw_timestamps, list):
-            return pairs
-        for item in raw_timestamps:
-            if not isinstance(item, (list, tuple)) or len(item) < 2:
-                continue
-            try:
-                start, end = float(item[0]), float(item[1])
-            except (TypeError, ValueError):
-                continue
-            pairs.append((start, end))
-        return pairs
+            return []
+        pairs = map(_parse_timestamp_pair, raw_timestamps)
+        return [pair for pair in pairs if pair is not None]
+
+    def _timestamp_bounds(self, raw_timestamps: Any) -> Optional[Tuple[float, float]]:
+        """(第一个有效时间戳的开始, 最后一个有效时间戳的结束)，与归一化后取首尾等价"""
+        if not isinstance(raw_timestamps, list):
+            return None
+        first = next(filter(None, map(_parse_timestamp_pair, raw_timestamps)), None)
+        if first is None:
+            return None
+        last = next(filter(None, map(_parse_timestamp_pair, reversed(raw_timestamps))))
+        return first[0], last[1]
 
     def _segments_from_text_timestamp(self, text: str, raw_timestamps: Any) -> List[dict]:
         """根据 FunASR 的字级 timestamp（毫秒）按标点切句。
@@ -519,45 +907,51 @@ class OfflineManager:
         if not text or not ts_pairs:
             return []
 
+        import numpy as np
+
+        # 逐字符码点查表得到类别，整段文本一次性计算，避免逐字 Python 循环
+        # surrogatepass：模型输出中孤立的代理码点不应导致编码失败
+        codes = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+        char_classes = _char_class_table()[np.minimum(codes, 0xFFFF)]
         # 标点和空白字符不消耗 timestamp 索引
-        punctuation_set = SENTENCE_PUNCTUATION | set("，,、：:""''\"'()（）【】[]《》<>—…·")
+        is_speech = char_classes == CHAR_SPEECH
+        speech_rank = np.cumsum(is_speech)  # 截至每个字符（含）已出现的语音字符数
+
+        # 句末标点处切分，最后一段到文本末尾
+        sentence_ends = np.flatnonzero(char_classes == CHAR_SENTENCE_END)
+        if sentence_ends.size == 0 or sentence_ends[-1] != len(codes) - 1:
+            sentence_ends = np.append(sentence_ends, len(codes) - 1)
+        sentence_starts = np.concatenate(([0], sentence_ends[:-1] + 1))
+
+        # 每段消耗的 timestamp 区间 [first, last)，超出 timestamp 数量的字符不再消耗
+        ts_count = len(ts_pairs)
+        first_ts = np.minimum(np.where(sentence_starts > 0, speech_rank[sentence_starts - 1], 0), ts_count)
+        last_ts = np.minimum(speech_rank[sentence_ends], ts_count)
 
         segments: List[dict] = []
-        current_chars: List[str] = []
-        current_start_ms: Optional[float] = None
-        current_end_ms: Optional[float] = None
-        ts_idx = 0
-
-        def flush_segment():
-            nonlocal current_chars, current_start_ms, current_end_ms
-            sentence = "".join(current_chars).strip()
-            if sentence:
-                start_sec = round(current_start_ms / 1000.0, 3) if current_start_ms is not None else 0.0
-                end_sec = round(current_end_ms / 1000.0, 3) if current_end_ms is not None else 0.0
-                segments.append({"text": sentence, "start_time": start_sec, "end_time": end_sec})
-            current_chars = []
-            current_start_ms = None
-            current_end_ms = None
-
-        for ch in text:
-            current_chars.append(ch)
-            # 只有非标点、非空白的实际语音字符才消耗一个 timestamp
-            is_speech_char = not ch.isspace() and ch not in punctuation_set
-            if is_speech_char and ts_idx < len(ts_pairs):
-                start_ms, end_ms = ts_pairs[ts_idx]
-                ts_idx += 1
-                if current_start_ms is None:
-                    current_start_ms = start_ms
-                current_end_ms = end_ms
-            if ch in SENTENCE_PUNCTUATION:
-                flush_segment()
-
-        flush_segment()
+        for begin, end, first, last in zip(sentence_starts.tolist(), sentence_ends.tolist(),
+                                           first_ts.tolist(), last_ts.tolist()):
+            sentence = text[begin:end + 1].strip()
+            if not sentence:
+                continue
+            if last > first:
+                start_sec = round(ts_pairs[first][0] / 1000.0, 3)
+                end_sec = round(ts_pairs[last - 1][1] / 1000.0, 3)
+            else:
+                start_sec = end_sec = 0.0
+            segments.append({"text": sentence, "start_time": start_sec, "end_time": end_sec})
         return segments
 
     def _select_device(self, preferred_device: str = "gpu") -> Tuple[str, Optional[str]]:
-        """选择离线识别设备"""
+        """选择离线识别设备（CUDA 探测结果在进程内不变，按偏好缓存）"""
         preferred = str(preferred_device or "gpu").lower()
+        cached = self._device_cache.get(preferred)
+        if cached is None:
+            cached = self._device_cache[preferred] = self._probe_device(preferred)
+        return cached
+
+    def _probe_device(self, preferred: str) -> Tuple[str, Optional[str]]:
+        """探测可用设备，返回 (设备, 降级提示)"""
         if preferred == "cpu":
             logger.info("离线识别按配置使用 CPU")
             return "cpu", None
@@ -606,11 +1000,20 @@ class OfflineManager:
             return None, str(exc)
 
     def _get_hotwords(self, meeting_id: str) -> str:
-        """获取热词"""
+        """获取热词（按文件修改时间和大小缓存，文件未变化时不重复读取）"""
         hotword_path = UPLOAD_DIR / 'hotwords.txt'
-        if hotword_path.exists():
-            return hotword_path.read_text().strip()
-        return ""
+        try:
+            st = hotword_path.stat()
+        except FileNotFoundError:
+            return ""
+
+        signature = (st.st_mtime_ns, st.st_size)
+        if self._hotword_cache and self._hotword_cache[0] == signature:
+            return self._hotword_cache[1]
+
+        hotwords = hotword_path.read_text().strip()
+        self._hotword_cache = (signature, hotwords)
+        return hotwords
 
     async def get_job(self, job_id: str) -> Optional[dict]:
         """获取任务状态"""
@@ -633,12 +1036,37 @@ class OfflineManager:
             "recognition": {
                 "percent": job.recognition_percent
             },
-            "result": job.result,
+            "result": await self._job_result(job),
             "error": job.error,
             "created_at": job.created_at.isoformat(),
             "updated_at": job.updated_at.isoformat()
         }
 
+    async def _job_result(self, job: OfflineJob) -> Optional[dict]:
+        """任务结果（全文和分段从会议记录读取）"""
+        if not job.result_in_meeting:
+            return job.result
+
+        from ..services.meeting_service import meeting_service
+        meeting = await meeting_service.get_meeting(job.meeting_id)
+        if not meeting:
+            return job.result
+        return {
+            'full_text': meeting.get('transcript', ''),
+            'segments': meeting.get('transcript_segments', []),
+            **job.result
+        }
+
+    def _prune_jobs(self) -> None:
+        """清理结束超过 JOB_RETENTION_SECONDS 的任务"""
+        cutoff = datetime.now().timestamp() - JOB_RETENTION_SECONDS
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.status in FINISHED_JOB_STATUSES and job.updated_at.timestamp() < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
     async def cancel_job(self, job_id: str) -> dict:
         """取消任务"""
         if job_id not in self._jobs:
@@ -646,7 +1074,7 @@ class OfflineManager:
 
         job = self._jobs[job_id]
 
-        if job.status in (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELED):
+        if job.status in FINISHED_JOB_STATUSES:
             raise HTTPException(status_code=400, detail="任务无法取消")
 
         job.status = JobStatus.CANCELED
@@ -673,8 +1101,7 @@ async def init_upload(request: Request):
     接受 JSON 格式请求体
     """
     try:
-        body = await request.json()
-        import json
+        body = await read_json_body(request)
 
         result = await offline_manager.create_upload_session(
             meeting_id=body.get('meeting_id'),
@@ -703,9 +1130,52 @@ async def upload_chunk(
 ):
     """上传单个分片 - 接受原始二进制数据"""
     try:
-        content = await request.body()
-        result = await offline_manager.upload_chunk(upload_id, chunk_index, content)
-        return result
+        return await offline_manager.upload_chunk_stream(upload_id, chunk_index, request.stream())
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.put("/uploads/{upload_id}/chunks", summary="批量上传分片")
+async def upload_chunks_batch(upload_id: str, request: Request):
+    """
+    一次请求上传多个分片，分摊请求开销
+    接受 multipart/form-data，每个文件字段名为分片序号
+    """
+    try:
+        form = await request.form()
+        chunks = []
+        try:
+            for name, part in form.multi_items():
+                if not isinstance(part, StarletteUploadFile):
+                    continue
+                try:
+                    chunk_index = int(name)
+                except ValueError:
+                    raise HTTPException(status_code=400, detail=f"无效的分片序号: {name}")
+                chunks.append((chunk_index, part.file))
+
+            if not chunks:
+                raise HTTPException(status_code=400, detail="请求中没有分片数据")
+
+            # 直接从表单临时文件拷贝，不读成 bytes
+            return await offline_manager.upload_chunks(upload_id, chunks)
+        finally:
+            await form.close()
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/uploads/{upload_id}/hashes", summary="获取分片哈希")
+async def get_chunk_hashes(upload_id: str):
+    """获取已上传分片的内容哈希（分片序号 -> 十六进制摘要）"""
+    try:
+        return await offline_manager.get_chunk_hashes(upload_id)
 
     except HTTPException:
         raise
@@ -720,7 +1190,7 @@ async def complete_upload(upload_id: str, request: Request):
     接受 JSON 格式请求体
     """
     try:
-        body = await request.json()
+        body = await read_json_body(request)
 
         result = await offline_manager.complete_upload(
             upload_id=upload_id,
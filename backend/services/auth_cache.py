@@ -0,0 +1,66 @@
+"""
+令牌验证缓存
+短时间内重复出现的令牌直接返回已验证的声明，跳过签名校验
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from .auth_service import AuthService
+
+
+class TokenCache:
+    """按令牌哈希缓存验证结果（只保存解码后的声明，不保存原始令牌）"""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 5.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[bytes, Tuple[dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def verify(self, token: str) -> Optional[dict]:
+        """验证令牌，命中缓存时不再校验签名"""
+        key = hashlib.sha256(token.encode()).digest()
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                claims, expires_at = entry
+                if now < expires_at:
+                    return claims
+                del self._entries[key]
+
+        payload = AuthService.verify_token_claims(token)
+        if not payload:
+            return None
+
+        claims = {
+            "user_id": payload["sub"],
+            "username": payload["username"]
+        }
+        # 缓存有效期不超过令牌本身的过期时间
+        expires_at = min(float(payload.get("exp", now)), now + self.ttl)
+
+        with self._lock:
+            self._entries[key] = (claims, expires_at)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        return claims
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+
+# 全局缓存实例
+token_cache = TokenCache()
+
+
+def cached_verify_token(token: str) -> Optional[dict]:
+    """带缓存的 AuthService.verify_token"""
+    return token_cache.verify(token)
@@ -2,11 +2,17 @@
 认证服务
 处理JWT Token生成和验证
 """
+import base64
+import hashlib
+import hmac
+import time
 import jwt
+import orjson
 import secrets
-from datetime import datetime, timedelta
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
 from ..config import config
 
@@ -28,43 +34,126 @@ def _load_or_create_secret_key() -> str:
     return new_key
 
 
+def _key_id(secret: str) -> str:
+    """由密钥派生 kid（不泄露密钥本身）"""
+    return hashlib.sha256(secret.encode()).hexdigest()[:16]
+
+
+def _load_verification_keys(current: str) -> Dict[str, bytes]:
+    """
+    kid -> 密钥映射：当前密钥 + 配置 auth.previous_secret_keys 中的旧密钥
+    轮换密钥时把旧密钥放入 previous_secret_keys，已签发的令牌在过期前仍然有效
+    密钥预先编码为 bytes，PyJWT 验签时不再逐次做 str -> bytes 转换
+    """
+    keys = {_key_id(current): current.encode()}
+    for secret in config.get('auth.previous_secret_keys') or []:
+        if secret:
+            keys.setdefault(_key_id(secret), secret.encode())
+    return keys
+
+
+def _b64url(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+
+@dataclass(slots=True, frozen=True)
+class _SigningKeys:
+    """签发/验签用到的密钥材料（首次使用时加载一次）"""
+    secret: bytes
+    key_id: str
+    verification_keys: Dict[str, bytes]
+    # 签发时不变的部分预先计算：头部的 base64url 编码和已载入密钥的 HMAC 状态
+    header_b64: bytes
+    signer: "hmac.HMAC"
+
+
+@lru_cache(maxsize=1)
+def _signing_keys() -> _SigningKeys:
+    """延迟加载密钥：读取/生成密钥文件的 I/O 不放在模块导入时执行"""
+    secret = _load_or_create_secret_key()
+    key_id = _key_id(secret)
+    secret_bytes = secret.encode()
+    return _SigningKeys(
+        secret=secret_bytes,
+        key_id=key_id,
+        verification_keys=_load_verification_keys(secret),
+        header_b64=_b64url(orjson.dumps({"alg": AuthService.ALGORITHM, "typ": "JWT", "kid": key_id})),
+        signer=hmac.new(secret_bytes, digestmod=hashlib.sha256),
+    )
+
+
+def parse_bearer_token(header: Optional[str]) -> Optional[str]:
+    """解析 Authorization 头中的 Bearer 令牌，格式不对时返回 None（不抛异常）"""
+    if not header or len(header) < 8:
+        return None
+    if header[:7].lower() != 'bearer ':
+        return None
+    return header[7:].strip() or None
+
+
 class AuthService:
     """认证服务"""
 
-    SECRET_KEY = _load_or_create_secret_key()
+    # HMAC 验签比 EdDSA/RSA 便宜得多，且签发与验证在同一服务内，不需要公钥分发
     ALGORITHM = "HS256"
+    _ALGORITHMS = (ALGORITHM,)
     ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24小时
+    _TOKEN_TTL_SECONDS = ACCESS_TOKEN_EXPIRE_MINUTES * 60
 
     @classmethod
     def create_access_token(cls, user_id: str, username: str) -> str:
-        """创建访问令牌"""
-        expire = datetime.utcnow() + timedelta(minutes=cls.ACCESS_TOKEN_EXPIRE_MINUTES)
+        """创建访问令牌（只序列化载荷，头部和签名密钥复用预计算结果）"""
+        now = int(time.time())
         payload = {
             "sub": user_id,
             "username": username,
-            "exp": expire,
-            "iat": datetime.utcnow()
+            "exp": now + cls._TOKEN_TTL_SECONDS,
+            "iat": now
         }
-        return jwt.encode(payload, cls.SECRET_KEY, algorithm=cls.ALGORITHM)
+        keys = _signing_keys()
+        signing_input = keys.header_b64 + b"." + _b64url(orjson.dumps(payload))
+        signer = keys.signer.copy()
+        signer.update(signing_input)
+        return (signing_input + b"." + _b64url(signer.digest())).decode()
 
     @classmethod
     def verify_token(cls, token: str) -> Optional[dict]:
         """验证令牌"""
+        payload = cls.verify_token_claims(token)
+        if not payload:
+            return None
+        return {
+            "user_id": payload["sub"],
+            "username": payload["username"]
+        }
+
+    @classmethod
+    def verify_token_claims(cls, token: str) -> Optional[dict]:
+        """验证令牌并返回完整载荷（含 exp）"""
         try:
-            payload = jwt.decode(token, cls.SECRET_KEY, algorithms=[cls.ALGORITHM])
-            return {
-                "user_id": payload["sub"],
-                "username": payload["username"]
-            }
+            payload = jwt.decode(token, cls._key_for(token), algorithms=cls._ALGORITHMS)
         except jwt.ExpiredSignatureError:
             return None
         except jwt.InvalidTokenError:
             return None
+        if "sub" not in payload or "username" not in payload:
+            return None
+        return payload
 
     @classmethod
     def decode_token(cls, token: str) -> Optional[dict]:
         """解码令牌（不验证过期）"""
         try:
-            return jwt.decode(token, cls.SECRET_KEY, algorithms=[cls.ALGORITHM], options={"verify_exp": False})
+            return jwt.decode(token, cls._key_for(token), algorithms=cls._ALGORITHMS,
+                              options={"verify_exp": False})
         except jwt.InvalidTokenError:
             return None
+
+    @classmethod
+    def _key_for(cls, token: str) -> bytes:
+        """按令牌头中的 kid 选择验签密钥（只有一个密钥时不解析头部；无 kid 的旧令牌用当前密钥）"""
+        keys = _signing_keys()
+        if len(keys.verification_keys) == 1:
+            return keys.secret
+        kid = jwt.get_unverified_header(token).get("kid")
+        return keys.verification_keys.get(kid, keys.secret)
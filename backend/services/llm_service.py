@@ -3,27 +3,88 @@ LLM服务模块
 支持多种LLM Provider: Ollama, OpenAI, Claude
 """
 import asyncio
+import copy
+import hashlib
 import json
 import logging
 import re
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from functools import lru_cache, wraps
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import aiohttp
+import orjson
 
 from ..config import config
 
 logger = logging.getLogger(__name__)
 
+# 解析 LLM 输出用到的正则（模块加载时编译一次）
+_RE_JSON_BLOCK = re.compile(r'```(?:json)?\s*([\s\S]*?)```', re.IGNORECASE)
+_RE_JSON_CODEBLOCK = re.compile(r'```(?:json)?[\s\S]*?```', re.IGNORECASE)
+_RE_CODEBLOCK = re.compile(r'```[\s\S]*?```', re.IGNORECASE)
+# JSON 扫描的词法单元：花括号，或一整段字符串（含转义，未闭合时延续到文本末尾）
+_RE_JSON_TOKEN = re.compile(r'[{}]|"[^"\\]*(?:\\[\s\S][^"\\]*)*"?')
+_RE_SECTION_SPLIT = re.compile(r'(?:待办事项?\s*\(?json\)?|决策\s*\(?json\)?)', re.IGNORECASE)
+_RE_KEYPOINT_HEADER = re.compile(r'(关键要点|会议要点|要点|重点)', re.IGNORECASE)
+_RE_KEYPOINT_END = re.compile(r'(待办|行动项|决策|json)', re.IGNORECASE)
+_RE_TODO_HEADER = re.compile(r'(待办事项?|action\s*items?)', re.IGNORECASE)
+_RE_TODO_END = re.compile(r'(决策|要点|总结|json)', re.IGNORECASE)
+_RE_JSON_WORD = re.compile(r'json', re.IGNORECASE)
+_RE_DECISION_LINE = re.compile(r'(决策|决定|通过|同意|确认)')
+# 以上分段/关键词正则的并集：不命中的行（多数正文行）只需处理列表项前缀
+_RE_LINE_KEYWORDS = re.compile(
+    r'要点|重点|待办|行动项|决策|决定|通过|同意|确认|总结|json|action\s*items?',
+    re.IGNORECASE,
+)
+_RE_SENTENCE_SPLIT = re.compile(r'[。！？!?；;\n]+')
+_RE_LEADING_PUNCT = re.compile(r'^[，。！？!?、；;：:,.·~…—\-]+')
+_RE_TODO_SENTENCE = re.compile(r'(待办|跟进|推进|落实|负责人|截止|完成|排期|安排)')
+_RE_DECISION_SENTENCE = re.compile(r'(决策|决定|通过|同意|确认|结论)')
+
+
+# 解析结果缓存：重试或重复轮次中相同的 LLM 响应不再重复走正则/JSON 解析
+PARSE_CACHE_SIZE = 256
+
+
+def _memoize_parse(parser):
+    """按响应文本的 blake2b 摘要缓存解析结果（LRU），返回深拷贝避免调用方修改共享结果"""
+    cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+
+    @wraps(parser)
+    def wrapper(response: str) -> Dict[str, Any]:
+        text = str(response or '')
+        key = hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        result = cache.get(key)
+        if result is None:
+            result = parser(text)
+            cache[key] = result
+            if len(cache) > PARSE_CACHE_SIZE:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        return copy.deepcopy(result)
+
+    wrapper.cache_clear = cache.clear
+    return wrapper
+
+
+def _ws_collapse(text: str) -> str:
+    """合并连续空白为单个空格并去掉首尾空白（等价于 re.sub(r'\\s+', ' ', text).strip()）"""
+    return ' '.join(text.split())
+
 
 def _dedupe_text_list(items: List[str], limit: int = 12) -> List[str]:
+    # seen 只保存 64 位哈希值，不持有长句字符串本身
     result: List[str] = []
-    seen = set()
+    seen: Set[int] = set()
     for item in items:
         text = str(item or '').strip()
         if not text:
             continue
-        key = re.sub(r'\s+', ' ', text)
+        key = hash(_ws_collapse(text))
         if key in seen:
             continue
         seen.add(key)
@@ -33,6 +94,16 @@ def _dedupe_text_list(items: List[str], limit: int = 12) -> List[str]:
     return result
 
 
+def _first_nonempty(item: Dict[str, Any], *keys: str) -> str:
+    """按顺序取第一个非空字段并转为去空白的字符串（等价于 str(a or b or '').strip()）"""
+    get = item.get
+    for key in keys:
+        value = get(key)
+        if value:
+            return str(value).strip()
+    return ''
+
+
 def _normalize_todo(item: Any) -> Optional[Dict[str, str]]:
     if isinstance(item, str):
         content = item.strip()
@@ -41,13 +112,13 @@ def _normalize_todo(item: Any) -> Optional[Dict[str, str]]:
         return {"content": content, "assignee": "", "deadline": ""}
 
     if isinstance(item, dict):
-        content = str(item.get("content") or item.get("task") or item.get("todo") or '').strip()
+        content = _first_nonempty(item, "content", "task", "todo")
         if not content:
             return None
         return {
             "content": content,
-            "assignee": str(item.get("assignee") or item.get("owner") or '').strip(),
-            "deadline": str(item.get("deadline") or item.get("due_date") or '').strip(),
+            "assignee": _first_nonempty(item, "assignee", "owner"),
+            "deadline": _first_nonempty(item, "deadline", "due_date"),
         }
 
     return None
@@ -61,12 +132,12 @@ def _normalize_decision(item: Any) -> Optional[Dict[str, str]]:
         return {"content": content, "vote_result": ""}
 
     if isinstance(item, dict):
-        content = str(item.get("content") or item.get("decision") or '').strip()
+        content = _first_nonempty(item, "content", "decision")
         if not content:
             return None
         return {
             "content": content,
-            "vote_result": str(item.get("vote_result") or item.get("result") or '').strip()
+            "vote_result": _first_nonempty(item, "vote_result", "result")
         }
 
     return None
@@ -74,10 +145,13 @@ def _normalize_decision(item: Any) -> Optional[Dict[str, str]]:
 
 def _dedupe_dict_items(items: List[Dict[str, str]], key_field: str, limit: int = 20) -> List[Dict[str, str]]:
     result: List[Dict[str, str]] = []
-    seen = set()
+    seen: Set[int] = set()
     for item in items:
-        key = re.sub(r'\s+', ' ', str(item.get(key_field, '')).strip())
-        if not key or key in seen:
+        text = _ws_collapse(str(item.get(key_field, '')))
+        if not text:
+            continue
+        key = hash(text)
+        if key in seen:
             continue
         seen.add(key)
         result.append(item)
@@ -86,57 +160,77 @@ def _dedupe_dict_items(items: List[Dict[str, str]], key_field: str, limit: int =
     return result
 
 
-def _extract_json_candidates(text: str) -> List[str]:
-    candidates: List[str] = []
+def _extract_json_candidates(text: str) -> List[Tuple[int, int]]:
+    """
+    返回 JSON 候选片段在 text 中的 (start, end) 区间（已去掉首尾空白）
+    按区间去重，调用方解析前再切片，避免为去重复制/哈希大段文本
+    """
+    candidates: List[Tuple[int, int]] = []
 
     # 优先提取 markdown json 代码块
-    for match in re.finditer(r'```(?:json)?\s*([\s\S]*?)```', text, flags=re.IGNORECASE):
-        block = match.group(1).strip()
-        if block.startswith('{') or block.startswith('['):
-            candidates.append(block)
+    for match in _RE_JSON_BLOCK.finditer(text):
+        start, end = match.span(1)
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if text[start:start + 1] in ('{', '['):
+            candidates.append((start, end))
 
     # 回退：提取正文里的平衡 JSON 对象
+    # 正则在 C 层跳过普通字符和整段字符串，Python 循环只处理花括号
     depth = 0
     start = None
-    in_string = False
-    escaped = False
-    for idx, ch in enumerate(text):
-        if in_string:
-            if escaped:
-                escaped = False
-            elif ch == '\\':
-                escaped = True
-            elif ch == '"':
-                in_string = False
-            continue
-
-        if ch == '"':
-            in_string = True
-            continue
-
+    for match in _RE_JSON_TOKEN.finditer(text):
+        ch = match.group()
         if ch == '{':
             if depth == 0:
-                start = idx
+                start = match.start()
             depth += 1
         elif ch == '}':
             if depth > 0:
                 depth -= 1
                 if depth == 0 and start is not None:
-                    chunk = text[start:idx + 1].strip()
-                    if len(chunk) <= 30000:
-                        candidates.append(chunk)
+                    end = match.end()
+                    if end - start <= 30000:
+                        candidates.append((start, end))
                     start = None
 
-    # 去重（保序）
-    uniq: List[str] = []
-    seen = set()
-    for item in candidates:
-        key = item.strip()
-        if key in seen:
-            continue
-        seen.add(key)
-        uniq.append(item)
-    return uniq
+    # 去重（保序）：代码块里的对象也会被花括号扫描再找到一次，区间相同
+    return list(dict.fromkeys(candidates))
+
+
+def _loads_json(candidate: str) -> Any:
+    """
+    解析 JSON 候选片段：优先 orjson，失败时退回标准库
+    （标准库额外接受 NaN/Infinity、超 64 位整数和孤立代理字符，保持原有容错行为）
+    """
+    try:
+        return orjson.loads(candidate)
+    except orjson.JSONDecodeError:
+        return json.loads(candidate)
+
+
+@lru_cache(maxsize=1)
+def _json_repair_loads():
+    """可选依赖 json_repair 的解析函数，未安装时返回 None"""
+    try:
+        from json_repair import loads
+    except ImportError:
+        return None
+    return loads
+
+
+def _repair_json_object(candidate: str) -> Optional[Dict[str, Any]]:
+    """修复常见的 LLM JSON 格式错误（尾逗号、单引号、未加引号的键等），失败返回 None"""
+    repair = _json_repair_loads()
+    if repair is None:
+        return None
+    try:
+        parsed = repair(candidate)
+    except Exception:
+        return None
+    return parsed if isinstance(parsed, dict) else None
 
 
 def _extract_structured_data(text: str) -> Dict[str, Any]:
@@ -146,11 +240,15 @@ def _extract_structured_data(text: str) -> Dict[str, Any]:
         "decisions": []
     }
 
-    for candidate in _extract_json_candidates(text):
+    for start, end in _extract_json_candidates(text):
+        candidate = text[start:end]
         try:
-            parsed = json.loads(candidate)
+            parsed = _loads_json(candidate)
         except Exception:
-            continue
+            # 接近合法的 JSON 先尝试修复，避免只能依赖逐行正则提取
+            parsed = _repair_json_object(candidate)
+            if parsed is None:
+                continue
 
         if isinstance(parsed, dict):
             key_points = parsed.get("key_points") or parsed.get("keypoints") or parsed.get("highlights") or []
@@ -167,9 +265,35 @@ def _extract_structured_data(text: str) -> Dict[str, Any]:
     return data
 
 
+_BULLET_MARKS = frozenset('-*•·')
+_NUMBER_SEPARATORS = frozenset('.)、')
+
+
+def _strip_bullet(line: str) -> Optional[str]:
+    """
+    识别列表项前缀（"-"、"*"、"•"、"·" 或 "1." / "1)" / "1、"），返回去掉前缀后的内容
+    不是列表项时返回 None；只检查行首几个字符，比正则匹配+替换两遍更便宜
+    """
+    if not line:
+        return None
+    if line[0] in _BULLET_MARKS:
+        return line[1:].strip()
+    i = 0
+    n = len(line)
+    while i < n and line[i].isdecimal():
+        i += 1
+    if 0 < i < n and line[i] in _NUMBER_SEPARATORS:
+        return line[i + 1:].strip()
+    return None
+
+
 def _strip_structured_blocks(text: str) -> str:
-    cleaned = re.sub(r'```(?:json)?[\s\S]*?```', '', text, flags=re.IGNORECASE)
-    cleaned = re.split(r'(?:待办事项?\s*\(?json\)?|决策\s*\(?json\)?)', cleaned, maxsplit=1, flags=re.IGNORECASE)[0]
+    # 多数响应是纯文本，先用子串判断跳过不可能命中的正则
+    cleaned = text
+    if '```' in cleaned:
+        cleaned = _RE_JSON_CODEBLOCK.sub('', cleaned)
+    if '待办' in cleaned or '决策' in cleaned:
+        cleaned = _RE_SECTION_SPLIT.split(cleaned, maxsplit=1)[0]
     return cleaned.strip()
 
 
@@ -179,18 +303,14 @@ def _extract_key_points_from_text(text: str) -> List[str]:
     in_keypoint_section = False
 
     for line in lines:
-        if re.search(r'(关键要点|会议要点|要点|重点)', line, flags=re.IGNORECASE):
+        if _RE_KEYPOINT_HEADER.search(line):
             in_keypoint_section = True
             continue
-        if in_keypoint_section and re.search(r'(待办|行动项|决策|json)', line, flags=re.IGNORECASE):
+        if in_keypoint_section and _RE_KEYPOINT_END.search(line):
             in_keypoint_section = False
             continue
 
-        is_bullet = bool(re.match(r'^(?:[-*•·]\s*|\d+[.)、]\s*)', line))
-        if not is_bullet:
-            continue
-
-        item = re.sub(r'^(?:[-*•·]\s*|\d+[.)、]\s*)', '', line).strip()
+        item = _strip_bullet(line)
         if not item:
             continue
 
@@ -206,18 +326,18 @@ def _extract_todos_from_text(text: str) -> List[Dict[str, str]]:
     in_todo_section = False
 
     for line in lines:
-        if re.search(r'(待办事项?|action\s*items?)', line, flags=re.IGNORECASE):
+        if _RE_TODO_HEADER.search(line):
             in_todo_section = True
             continue
-        if in_todo_section and re.search(r'(决策|要点|总结|json)', line, flags=re.IGNORECASE):
+        if in_todo_section and _RE_TODO_END.search(line):
             in_todo_section = False
             continue
 
         content = ''
         if '[待办]' in line:
             content = line.split('[待办]', 1)[1].strip()
-        elif in_todo_section and re.match(r'^(?:[-*•·]\s*|\d+[.)、]\s*)', line):
-            content = re.sub(r'^(?:[-*•·]\s*|\d+[.)、]\s*)', '', line).strip()
+        elif in_todo_section:
+            content = _strip_bullet(line) or ''
 
         if not content:
             continue
@@ -230,20 +350,20 @@ def _extract_todos_from_text(text: str) -> List[Dict[str, str]]:
 
 
 def _extract_decisions_from_text(text: str) -> List[Dict[str, str]]:
-    cleaned = re.sub(r'```[\s\S]*?```', '', text, flags=re.IGNORECASE)
+    cleaned = _RE_CODEBLOCK.sub('', text)
     lines = [line.strip() for line in cleaned.splitlines() if line.strip()]
     decisions: List[Dict[str, str]] = []
 
     for line in lines:
-        if re.search(r'json', line, flags=re.IGNORECASE):
+        if _RE_JSON_WORD.search(line):
             continue
-        if line.startswith('{') or line.startswith('}') or line.startswith('"'):
+        if line[:1] in ('{', '}', '"'):
             continue
 
         content = ''
         if '[决策]' in line:
             content = line.split('[决策]', 1)[1].strip()
-        elif re.search(r'(决策|决定|通过|同意|确认)', line) and len(line) >= 8:
+        elif _RE_DECISION_LINE.search(line) and len(line) >= 8:
             content = line
 
         if not content:
@@ -256,28 +376,115 @@ def _extract_decisions_from_text(text: str) -> List[Dict[str, str]]:
     return _dedupe_dict_items(decisions, key_field="content", limit=20)
 
 
+def _extract_all_from_text(text: str) -> Tuple[List[str], List[Dict[str, str]], List[Dict[str, str]]]:
+    """
+    单次遍历同时提取要点、待办和决策，结果与三个单独的提取函数一致
+    文本含代码块时决策提取的行划分不同，退回分别提取
+    """
+    if '```' in text:
+        return (
+            _extract_key_points_from_text(text),
+            _extract_todos_from_text(text),
+            _extract_decisions_from_text(text),
+        )
+
+    key_points: List[str] = []
+    todos: List[Dict[str, str]] = []
+    decisions: List[Dict[str, str]] = []
+    in_keypoint_section = False
+    in_todo_section = False
+
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        bullet_item = _strip_bullet(line)
+
+        if not _RE_LINE_KEYWORDS.search(line):
+            # 不含任何分段/关键词：只可能是要点或待办分段中的列表项
+            if bullet_item:
+                if in_keypoint_section or len(bullet_item) >= 4:
+                    key_points.append(bullet_item)
+                todo = _normalize_todo(bullet_item) if in_todo_section else None
+                if todo:
+                    todos.append(todo)
+            continue
+
+        # 要点
+        if _RE_KEYPOINT_HEADER.search(line):
+            in_keypoint_section = True
+        elif in_keypoint_section and _RE_KEYPOINT_END.search(line):
+            in_keypoint_section = False
+        elif bullet_item and (in_keypoint_section or len(bullet_item) >= 4):
+            key_points.append(bullet_item)
+
+        # 待办
+        if _RE_TODO_HEADER.search(line):
+            in_todo_section = True
+        elif in_todo_section and _RE_TODO_END.search(line):
+            in_todo_section = False
+        else:
+            content = ''
+            if '[待办]' in line:
+                content = line.split('[待办]', 1)[1].strip()
+            elif in_todo_section and bullet_item:
+                content = bullet_item
+            todo = _normalize_todo(content) if content else None
+            if todo:
+                todos.append(todo)
+
+        # 决策
+        if _RE_JSON_WORD.search(line) or line[0] in '{}"':
+            continue
+        content = ''
+        if '[决策]' in line:
+            content = line.split('[决策]', 1)[1].strip()
+        elif _RE_DECISION_LINE.search(line) and len(line) >= 8:
+            content = line
+        decision = _normalize_decision(content) if content else None
+        if decision:
+            decisions.append(decision)
+
+    return (
+        _dedupe_text_list(key_points, limit=10),
+        _dedupe_dict_items(todos, key_field="content", limit=20),
+        _dedupe_dict_items(decisions, key_field="content", limit=20),
+    )
+
+
+@_memoize_parse
 def _parse_llm_response(response: str) -> Dict[str, Any]:
     text = str(response or '').strip()
     structured = _extract_structured_data(text)
     summary_text = _strip_structured_blocks(text) or text
 
-    key_points = _dedupe_text_list(structured["key_points"] + _extract_key_points_from_text(summary_text), limit=10)
-
-    todos: List[Dict[str, str]] = []
-    for item in structured["todos"]:
-        normalized = _normalize_todo(item)
-        if normalized:
-            todos.append(normalized)
-    todos.extend(_extract_todos_from_text(text))
-    todos = _dedupe_dict_items(todos, key_field="content", limit=20)
-
-    decisions: List[Dict[str, str]] = []
-    for item in structured["decisions"]:
-        normalized = _normalize_decision(item)
-        if normalized:
-            decisions.append(normalized)
-    decisions.extend(_extract_decisions_from_text(text))
-    decisions = _dedupe_dict_items(decisions, key_field="content", limit=20)
+    # 先合并结构化 JSON 的结果；已达到上限的类别不再做逐行文本提取
+    key_points = _dedupe_text_list(structured["key_points"], limit=10)
+    todos = _dedupe_dict_items(
+        [todo for item in structured["todos"] if (todo := _normalize_todo(item))],
+        key_field="content", limit=20,
+    )
+    decisions = _dedupe_dict_items(
+        [decision for item in structured["decisions"] if (decision := _normalize_decision(item))],
+        key_field="content", limit=20,
+    )
+    need_key_points = len(key_points) < 10
+    need_todos = len(todos) < 20
+    need_decisions = len(decisions) < 20
+
+    line_key_points: Optional[List[str]] = None
+    if need_todos or need_decisions:
+        line_key_points, line_todos, line_decisions = _extract_all_from_text(text)
+        if need_todos:
+            todos = _dedupe_dict_items(todos + line_todos, key_field="content", limit=20)
+        if need_decisions:
+            decisions = _dedupe_dict_items(decisions + line_decisions, key_field="content", limit=20)
+
+    if need_key_points:
+        if line_key_points is None or summary_text != text:
+            # 要点只从去掉结构化块后的正文中提取
+            line_key_points = _extract_key_points_from_text(summary_text)
+        key_points = _dedupe_text_list(key_points + line_key_points, limit=10)
 
     return {
         'summary': summary_text,
@@ -289,13 +496,13 @@ def _parse_llm_response(response: str) -> Dict[str, Any]:
 
 def _split_sentences(text: str, limit: int = 80) -> List[str]:
     cleaned = str(text or '').replace('\r', '\n')
-    parts = re.split(r'[。！？!?；;\n]+', cleaned)
+    parts = _RE_SENTENCE_SPLIT.split(cleaned)
     sentences: List[str] = []
     for part in parts:
-        line = re.sub(r'\s+', ' ', part).strip()
+        line = _ws_collapse(part)
         if len(line) < 2:
             continue
-        line = re.sub(r'^[，。！？!?、；;：:,.·~…—\-]+', '', line).strip()
+        line = _RE_LEADING_PUNCT.sub('', line).strip()
         if not line:
             continue
         sentences.append(line)
@@ -316,19 +523,18 @@ def _fallback_summarize(text: str, options: Optional[Dict[str, Any]] = None) ->
 
     key_points = _dedupe_text_list(sentences[:8], limit=8)
 
-    todos = _extract_todos_from_text(text)
+    _, todos, decisions = _extract_all_from_text(text)
     if not todos:
         for sentence in sentences:
-            if re.search(r'(待办|跟进|推进|落实|负责人|截止|完成|排期|安排)', sentence):
+            if _RE_TODO_SENTENCE.search(sentence):
                 normalized = _normalize_todo(sentence)
                 if normalized:
                     todos.append(normalized)
     todos = _dedupe_dict_items(todos, key_field="content", limit=20)
 
-    decisions = _extract_decisions_from_text(text)
     if not decisions:
         for sentence in sentences:
-            if re.search(r'(决策|决定|通过|同意|确认|结论)', sentence):
+            if _RE_DECISION_SENTENCE.search(sentence):
                 normalized = _normalize_decision(sentence)
                 if normalized:
                     decisions.append(normalized)
@@ -353,10 +559,10 @@ def _normalize_turning_point(item: Any) -> Optional[Dict[str, str]]:
         return {"label": label, "type": "milestone"}
 
     if isinstance(item, dict):
-        label = str(item.get("label") or item.get("content") or item.get("summary") or "").strip()
+        label = _first_nonempty(item, "label", "content", "summary")
         if not label:
             return None
-        point_type = str(item.get("type") or item.get("kind") or item.get("category") or "milestone").strip().lower()
+        point_type = _first_nonempty(item, "type", "kind", "category").lower() or "milestone"
         if point_type not in ("milestone", "decision", "action"):
             point_type = "milestone"
         return {"label": label, "type": point_type}
@@ -364,13 +570,14 @@ def _normalize_turning_point(item: Any) -> Optional[Dict[str, str]]:
     return None
 
 
+@_memoize_parse
 def _parse_realtime_ai_response(response_text: str) -> Dict[str, Any]:
     raw_text = str(response_text or "").strip()
     parsed: Dict[str, Any] = {}
 
-    for candidate in _extract_json_candidates(raw_text):
+    for start, end in _extract_json_candidates(raw_text):
         try:
-            obj = json.loads(candidate)
+            obj = _loads_json(raw_text[start:end])
         except Exception:
             continue
         if isinstance(obj, dict):
@@ -390,11 +597,11 @@ def _parse_realtime_ai_response(response_text: str) -> Dict[str, Any]:
     decisions_raw = parsed.get("decisions") or []
     turning_points_raw = parsed.get("turning_points") or parsed.get("milestones") or parsed.get("timeline_points") or []
 
-    key_points = _dedupe_text_list([str(item).strip() for item in key_points_raw if str(item).strip()], limit=8)
+    key_points = _dedupe_text_list([text for item in key_points_raw if (text := str(item).strip())], limit=8)
     decisions = _dedupe_text_list([
-        str(item.get("content") if isinstance(item, dict) else item).strip()
+        text
         for item in decisions_raw
-        if str(item.get("content") if isinstance(item, dict) else item).strip()
+        if (text := str(item.get("content") if isinstance(item, dict) else item).strip())
     ], limit=6)
 
     turning_points: List[Dict[str, str]] = []
@@ -427,6 +634,17 @@ def _parse_realtime_ai_response(response_text: str) -> Dict[str, Any]:
     }
 
 
+# Provider 共享 HTTP 连接池参数
+HTTP_POOL_LIMIT = 32
+HTTP_KEEPALIVE_TIMEOUT = 60
+HTTP_DNS_CACHE_TTL = 300
+
+
+def _json_dumps(obj: Any) -> str:
+    """aiohttp 请求体序列化（orjson，长转写提示词比标准库快得多）"""
+    return orjson.dumps(obj).decode()
+
+
 class LLMProvider(ABC):
     """LLM Provider抽象基类"""
 
@@ -440,6 +658,30 @@ class LLMProvider(ABC):
         """检查服务是否可用"""
         pass
 
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """
+        获取共享的 HTTP 会话（连接池复用 TCP/TLS 连接，避免每次调用重新握手）
+        会话绑定事件循环，循环变化或已关闭时重新创建
+        """
+        loop = asyncio.get_running_loop()
+        session = self._session
+        if session is None or session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_POOL_LIMIT,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            )
+            session = aiohttp.ClientSession(trust_env=True, connector=connector, json_serialize=_json_dumps)
+            self._session = session
+            self._session_loop = loop
+        return session
+
+    async def aclose(self) -> None:
+        """关闭共享的 HTTP 会话"""
+        session, self._session, self._session_loop = self._session, None, None
+        if session is not None and not session.closed:
+            await session.close()
+
 
 class OllamaProvider(LLMProvider):
     """Ollama本地LLM Provider"""
@@ -448,6 +690,8 @@ class OllamaProvider(LLMProvider):
         self.model = model or config.llm.get('model', 'qwen2.5:7b')
         self.api_base = api_base or config.llm.get('api_base', 'http://localhost:11434')
         self.summary_config = config.llm.get('summary', {})
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
 
     async def _call_api(self, prompt: str) -> str:
         """调用Ollama API"""
@@ -463,13 +707,13 @@ class OllamaProvider(LLMProvider):
             }
         }
 
-        async with aiohttp.ClientSession(trust_env=True) as session:
-            async with session.post(url, json=payload) as response:
-                if response.status != 200:
-                    raise Exception(f"Ollama API error: {response.status}")
+        session = await self._get_session()
+        async with session.post(url, json=payload) as response:
+            if response.status != 200:
+                raise Exception(f"Ollama API error: {response.status}")
 
-                result = await response.json()
-                return result.get('response', '')
+            result = orjson.loads(await response.read())
+            return result.get('response', '')
 
     async def summarize(self, text: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """总结会议内容"""
@@ -491,19 +735,20 @@ class OllamaProvider(LLMProvider):
             "你是一个专业的会议记录助手。请对以下会议内容进行总结，提取关键要点、待办事项和决策。\n\n{text}"
         )
 
-        prompt = template.format(text=text)
+        # 长转写下 prompt 很大，追加选项时收集后一次拼接，避免多次复制
+        parts = [template.format(text=text)]
 
         # 添加选项
         if options.get('extract_todos'):
-            prompt += "\n\n请特别标注待办事项，格式为：【待办】任务内容 - 负责人（如果有）"
+            parts.append("\n\n请特别标注待办事项，格式为：【待办】任务内容 - 负责人（如果有）")
 
         if options.get('extract_decisions'):
-            prompt += "\n\n请特别标注会议决策，格式为：【决策】决策内容"
+            parts.append("\n\n请特别标注会议决策，格式为：【决策】决策内容")
 
         if options.get('summary_length') == 'brief':
-            prompt += "\n\n请用简洁的语言总结，字数控制在200字以内。"
+            parts.append("\n\n请用简洁的语言总结，字数控制在200字以内。")
 
-        return prompt
+        return ''.join(parts)
 
     def _parse_response(self, response: str) -> Dict[str, Any]:
         """解析LLM响应"""
@@ -513,9 +758,9 @@ class OllamaProvider(LLMProvider):
         """检查Ollama是否可用"""
         try:
             url = f"{self.api_base}/api/tags"
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as response:
-                    return response.status == 200
+            session = await self._get_session()
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                return response.status == 200
         except Exception:
             return False
 
@@ -528,6 +773,8 @@ class OpenAIProvider(LLMProvider):
         self.api_key = api_key or config.llm.get('api_key', '')
         self.api_base = api_base or config.llm.get('api_base', 'https://api.openai.com/v1')
         self.summary_config = config.llm.get('summary', {})
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
 
     async def _call_api(self, prompt: str) -> str:
         """调用OpenAI API"""
@@ -548,14 +795,14 @@ class OpenAIProvider(LLMProvider):
             "temperature": self.summary_config.get('temperature', 0.7),
         }
 
-        async with aiohttp.ClientSession(trust_env=True) as session:
-            async with session.post(url, json=payload, headers=headers) as response:
-                if response.status != 200:
-                    error = await response.text()
-                    raise Exception(f"OpenAI API error: {error}")
+        session = await self._get_session()
+        async with session.post(url, json=payload, headers=headers) as response:
+            if response.status != 200:
+                error = await response.text()
+                raise Exception(f"OpenAI API error: {error}")
 
-                result = await response.json()
-                return result['choices'][0]['message']['content']
+            result = orjson.loads(await response.read())
+            return result['choices'][0]['message']['content']
 
     async def summarize(self, text: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """总结会议内容"""
@@ -570,15 +817,15 @@ class OpenAIProvider(LLMProvider):
             "你是一个专业的会议记录助手。请对以下会议内容进行总结，提取关键要点、待办事项和决策。\n\n{text}"
         )
 
-        prompt = template.format(text=text)
+        parts = [template.format(text=text)]
 
         if options.get('extract_todos'):
-            prompt += "\n\n请用JSON格式返回待办事项: {\"todos\": [{\"content\": \"任务\", \"assignee\": \"负责人\", \"deadline\": \"截止日期\"}]}"
+            parts.append("\n\n请用JSON格式返回待办事项: {\"todos\": [{\"content\": \"任务\", \"assignee\": \"负责人\", \"deadline\": \"截止日期\"}]}")
 
         if options.get('extract_decisions'):
-            prompt += "\n\n请用JSON格式返回决策: {\"decisions\": [{\"content\": \"决策\", \"vote_result\": \"表决结果\"}]}"
+            parts.append("\n\n请用JSON格式返回决策: {\"decisions\": [{\"content\": \"决策\", \"vote_result\": \"表决结果\"}]}")
 
-        return prompt
+        return ''.join(parts)
 
     def _parse_response(self, response: str) -> Dict[str, Any]:
         """解析响应"""
@@ -590,9 +837,9 @@ class OpenAIProvider(LLMProvider):
             url = f"{self.api_base}/models"
             headers = {"Authorization": f"Bearer {self.api_key}"}
 
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=5)) as response:
-                    return response.status == 200
+            session = await self._get_session()
+            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                return response.status == 200
         except Exception:
             return False
 
@@ -627,28 +874,46 @@ class ClaudeProvider(OpenAIProvider):
             ]
         }
 
-        async with aiohttp.ClientSession(trust_env=True) as session:
-            async with session.post(url, json=payload, headers=headers) as response:
-                if response.status != 200:
-                    error = await response.text()
-                    raise Exception(f"Claude API error: {error}")
+        session = await self._get_session()
+        async with session.post(url, json=payload, headers=headers) as response:
+            if response.status != 200:
+                error = await response.text()
+                raise Exception(f"Claude API error: {error}")
 
-                result = await response.json()
-                return result['content'][0]['text']
+            result = orjson.loads(await response.read())
+            return result['content'][0]['text']
 
 
 class LLMService:
     """LLM服务管理类"""
 
     _providers: Dict[str, LLMProvider] = {}
+    # 当前 Provider 及其对应的 llm 配置对象（配置重新加载后对象会变化，据此失效）
+    _current: Optional[Tuple[Dict[str, Any], LLMProvider]] = None
+
+    # 相同文本+选项的总结结果缓存，以及正在进行中的请求（合并并发重复调用）
+    RESULT_CACHE_SIZE = 1024
+    RESULT_CACHE_TTL = 3600
+    _result_cache: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+    _inflight: Dict[bytes, asyncio.Future] = {}
 
     @classmethod
     def get_provider(cls) -> LLMProvider:
-        """获取当前配置的LLM Provider"""
-        provider_type = config.llm.get('provider', 'ollama')
+        """
+        获取当前配置的LLM Provider
+        检查与创建之间没有 await，在事件循环内是原子的，并发的首次调用不会重复创建
+        """
+        llm_config = config.llm
+        current = cls._current
+        if current is not None and current[0] is llm_config:
+            return current[1]
 
-        if provider_type in cls._providers:
-            return cls._providers[provider_type]
+        provider_type = llm_config.get('provider', 'ollama')
+
+        provider = cls._providers.get(provider_type)
+        if provider is not None:
+            cls._current = (llm_config, provider)
+            return provider
 
         if provider_type == 'ollama':
             provider = OllamaProvider()
@@ -660,6 +925,7 @@ class LLMService:
             provider = OllamaProvider()
 
         cls._providers[provider_type] = provider
+        cls._current = (llm_config, provider)
         return provider
 
     @classmethod
@@ -669,13 +935,68 @@ class LLMService:
         options = options or {}
         allow_rule_fallback = bool(options.get("allow_rule_fallback", False))
         try:
-            return await provider.summarize(text, options)
+            # 缓存和合并等待共用同一个结果对象，每个调用方拿到自己的深拷贝
+            return copy.deepcopy(await cls._summarize_shared(provider, text, options))
         except Exception as exc:
             if allow_rule_fallback:
                 logger.warning("LLM总结失败，回退到规则摘要: %s", exc)
                 return _fallback_summarize(text, options)
             raise
 
+    @classmethod
+    def _summary_key(cls, provider: LLMProvider, text: str, options: Dict[str, Any]) -> bytes:
+        """缓存键：Provider + 文本 + 选项"""
+        raw = b"\0".join((
+            type(provider).__name__.encode(),
+            text.encode(),
+            orjson.dumps(options, option=orjson.OPT_SORT_KEYS),
+        ))
+        return hashlib.blake2b(raw, digest_size=16).digest()
+
+    @classmethod
+    async def _summarize_shared(cls, provider: LLMProvider, text: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        """带缓存的总结：命中缓存直接返回，相同请求进行中则等待其结果"""
+        key = cls._summary_key(provider, text, options)
+
+        cached = cls._result_cache.get(key)
+        if cached is not None:
+            result, expires_at = cached
+            if time.monotonic() < expires_at:
+                cls._result_cache.move_to_end(key)
+                return result
+            del cls._result_cache[key]
+
+        pending = cls._inflight.get(key)
+        if pending is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # 发起请求的一方被取消，由当前调用方重新发起
+                return await cls._summarize_shared(provider, text, options)
+
+        future = asyncio.get_running_loop().create_future()
+        cls._inflight[key] = future
+        try:
+            result = await provider.summarize(text, options)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # 没有等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            cls._result_cache[key] = (result, time.monotonic() + cls.RESULT_CACHE_TTL)
+            if len(cls._result_cache) > cls.RESULT_CACHE_SIZE:
+                cls._result_cache.popitem(last=False)
+            return result
+        finally:
+            cls._inflight.pop(key, None)
+
     @classmethod
     async def is_available(cls) -> bool:
         """检查LLM服务是否可用"""
@@ -683,9 +1004,20 @@ class LLMService:
         return await provider.is_available()
 
     @classmethod
-    def reset(cls) -> None:
+    async def aclose(cls) -> None:
+        """关闭各 Provider 的 HTTP 连接池"""
+        for provider in list(cls._providers.values()):
+            await provider.aclose()
+
+    @classmethod
+    async def reset(cls) -> None:
         """重置Provider缓存"""
+        await cls.aclose()
         cls._providers.clear()
+        cls._current = None
+        cls._result_cache.clear()
+        _parse_llm_response.cache_clear()
+        _parse_realtime_ai_response.cache_clear()
 
     @classmethod
     async def generate_realtime_summary(cls, text: str, previous_summary: str = "") -> Dict[str, Any]:
@@ -1,32 +1,378 @@
 """
 会议管理服务
 """
-import json
+import asyncio
 import os
+import sqlite3
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from uuid import uuid4
 
+import orjson
+from fastapi.concurrency import run_in_threadpool
+
 from ..config import config
 
 
 class MeetingService:
     """会议服务类"""
 
+    # 实时转写追加的合并写入间隔（秒），以及提前写入的排队字符数上限
+    TRANSCRIPT_FLUSH_DELAY = 0.2
+    TRANSCRIPT_FLUSH_CHARS = 32 * 1024
+    # 不写入会议 JSON 的字段：片段存放在片段表，转写按追加批次存放在转写分段表
+    _DETACHED_FIELDS = frozenset(("transcript_segments", "transcript_parts"))
+    # 检索结果中转写摘要的长度
+    SEARCH_PREVIEW_CHARS = 200
+    # 内存中缓存的进行中会议数上限（超出时淘汰最久未访问的）
+    ACTIVE_SESSION_LIMIT = 64
+    # 内存中缓存的最近读取的已结束会议数上限（总结、导出等会连续读写同一会议）
+    RECENT_MEETING_LIMIT = 16
+
     def __init__(self):
-        self.data_dir = Path(__file__).parent.parent.parent / 'data' / 'meetings'
-        self.data_dir.mkdir(parents=True, exist_ok=True)
+        project_root = Path(__file__).parent.parent.parent
+        # 旧版每个会议一个 JSON 文件，仅在首次建库时导入
+        self.data_dir = project_root / 'data' / 'meetings'
+
+        # 会议存储：会议 JSON + 列表字段投影 + 全文检索（SQLite FTS5 trigram，支持中文子串匹配）
+        self.db_path = project_root / config.database.get('path', 'data/meetings.db')
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # 写入共用一个连接（加锁串行）；读取用每个线程自己的只读连接，
+        # WAL 模式下读不会被写事务阻塞，事件循环中的主键查询也不必等待写锁
+        self._db_lock = threading.Lock()
+        self._db = self._open_db()
+        self._readers = threading.local()
+
+        # 排队中的转写追加：meeting_id -> [(text, segment), ...]
+        self._pending_transcripts: Dict[str, List[Tuple[str, Optional[Dict[str, Any]]]]] = {}
+        self._flush_tasks: Dict[str, asyncio.Task] = {}
+        self._pending_chars: Dict[str, int] = {}
+        self._meeting_locks = [asyncio.Lock() for _ in range(64)]
+
+        # 进行中会议的内存副本：追加转写时不再每次读取并解析整条会议记录
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # 最近读取的已结束会议：所有写入都经过本服务并持有会议锁，缓存不会过期
+        self._recent: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # 会议锁只保证同一会议串行，两个缓存由不同线程中的不同会议共同修改，需单独加锁
+        self._cache_lock = threading.Lock()
+
+    def _open_db(self) -> sqlite3.Connection:
+        """打开会议数据库（WAL 模式），首次创建时导入旧版会议文件"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'meetings'").fetchone():
+            return conn
+
+        with conn:
+            conn.execute(
+                "CREATE TABLE meetings ("
+                "id TEXT PRIMARY KEY, user_id TEXT, name TEXT, mode TEXT, status TEXT, "
+                "created_at TEXT, updated_at TEXT, duration INTEGER, payload BLOB)"
+            )
+            # 列表查询的覆盖索引：包含列表返回的全部字段，按用户分页只扫描索引，不访问带会议 JSON 的表行
+            conn.execute(
+                "CREATE INDEX meetings_list ON meetings "
+                "(user_id, updated_at, id, name, mode, status, created_at, duration)"
+            )
+            # 转写按每次写入追加的批次分段存放，检索索引只对新分段分词，不随会议变长重建
+            conn.execute("CREATE TABLE meeting_transcript (id INTEGER PRIMARY KEY, meeting_id TEXT, text TEXT)")
+            conn.execute("CREATE INDEX meeting_transcript_meeting ON meeting_transcript (meeting_id, id)")
+            conn.execute(
+                "CREATE VIRTUAL TABLE transcript_fts USING fts5("
+                "text, content = 'meeting_transcript', content_rowid = 'id', tokenize = 'trigram')"
+            )
+            # 总结单独存放序列化好的 JSON，读取时直接返回
+            conn.execute("CREATE TABLE meeting_summaries (meeting_id TEXT PRIMARY KEY, payload BLOB)")
+            # 转写片段按序追加，每个片段一行，追加时不重写整条会议记录
+            conn.execute(
+                "CREATE TABLE meeting_segments ("
+                "meeting_id TEXT, seq INTEGER, segment BLOB, PRIMARY KEY (meeting_id, seq)) WITHOUT ROWID"
+            )
 
-    def _get_meeting_path(self, meeting_id: str) -> Path:
-        """获取会议数据文件路径"""
-        return self.data_dir / f"{meeting_id}.json"
+            for path in self.data_dir.glob('*.json'):
+                try:
+                    meeting = self._from_document(orjson.loads(path.read_bytes()))
+                    self._write_rows(conn, meeting, summary_changed=True, segments_from=0, transcript_from=0)
+                except (OSError, ValueError, KeyError):
+                    continue
+        return conn
+
+    @staticmethod
+    def _from_document(document: Dict[str, Any]) -> Dict[str, Any]:
+        """把完整会议文档（transcript 为整段文本）转换为内存中的分段形式"""
+        meeting = {}
+        for key, value in document.items():
+            if key == "transcript":
+                meeting["transcript_parts"] = [value] if value else []
+            else:
+                meeting[key] = value
+        meeting.setdefault("transcript_parts", [])
+        return meeting
+
+    @staticmethod
+    def _snapshot(meeting: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        把内存中的会议转换为对外返回的文档（transcript 拼成整段文本）
+        片段列表复制一份，缓存中的会议后续追加片段不影响已返回的结果
+        """
+        result = {}
+        for key, value in meeting.items():
+            if key == "transcript_parts":
+                if len(value) > 1:
+                    # 合并已追加的分段，之后再读取时不必重复拼接
+                    value[:] = ["".join(value)]
+                result["transcript"] = value[0] if value else ""
+            elif key == "transcript_segments":
+                result[key] = list(value)
+            else:
+                result[key] = value
+        return result
+
+    @classmethod
+    def _meeting_row(cls, meeting: Dict[str, Any]) -> tuple:
+        return (
+            meeting["id"],
+            meeting.get("user_id") or "",
+            meeting["name"],
+            meeting["mode"],
+            meeting["status"],
+            meeting["created_at"],
+            meeting.get("updated_at") or meeting["created_at"],
+            meeting.get("duration", 0),
+            # 片段和转写分别存放在 meeting_segments、meeting_transcript
+            orjson.dumps({k: v for k, v in meeting.items() if k not in cls._DETACHED_FIELDS}),
+        )
+
+    @staticmethod
+    def _delete_transcript_rows(conn: sqlite3.Connection, meeting_id: str) -> None:
+        """删除会议的转写分段及其检索索引（外部内容表需用原文删除索引）"""
+        conn.execute(
+            "INSERT INTO transcript_fts (transcript_fts, rowid, text) "
+            "SELECT 'delete', id, text FROM meeting_transcript WHERE meeting_id = ?",
+            (meeting_id,)
+        )
+        conn.execute("DELETE FROM meeting_transcript WHERE meeting_id = ?", (meeting_id,))
+
+    @classmethod
+    def _write_rows(cls, conn: sqlite3.Connection, meeting: Dict[str, Any], summary_changed: bool,
+                    segments_from: Optional[int] = None, transcript_from: Optional[int] = None) -> None:
+        """
+        写入会议行，总结未变化时不重写总结行
+        segments_from / transcript_from: None 表示片段/转写未变化；0 表示整体替换；
+        其余值表示只追加该序号之后的片段/转写分段
+        """
+        meeting_id = meeting["id"]
+        conn.execute(
+            "INSERT INTO meetings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET "
+            "user_id = excluded.user_id, name = excluded.name, mode = excluded.mode, "
+            "status = excluded.status, created_at = excluded.created_at, updated_at = excluded.updated_at, "
+            "duration = excluded.duration, payload = excluded.payload",
+            cls._meeting_row(meeting)
+        )
+        if segments_from is not None:
+            if segments_from == 0:
+                conn.execute("DELETE FROM meeting_segments WHERE meeting_id = ?", (meeting_id,))
+            segments = meeting.get("transcript_segments") or []
+            conn.executemany(
+                "INSERT INTO meeting_segments VALUES (?, ?, ?)",
+                [
+                    (meeting_id, seq, orjson.dumps(segments[seq]))
+                    for seq in range(segments_from, len(segments))
+                ]
+            )
+        if transcript_from is not None:
+            if transcript_from == 0:
+                cls._delete_transcript_rows(conn, meeting_id)
+            # 只对新追加的分段分词建索引
+            for text in meeting["transcript_parts"][transcript_from:]:
+                cursor = conn.execute(
+                    "INSERT INTO meeting_transcript (meeting_id, text) VALUES (?, ?)", (meeting_id, text)
+                )
+                conn.execute("INSERT INTO transcript_fts (rowid, text) VALUES (?, ?)", (cursor.lastrowid, text))
+        if summary_changed and meeting.get("summary"):
+            conn.execute(
+                "INSERT OR REPLACE INTO meeting_summaries VALUES (?, ?)",
+                (meeting["id"], orjson.dumps(meeting["summary"]))
+            )
+
+    def _lock_for(self, meeting_id: str) -> asyncio.Lock:
+        """会议读写锁（按 ID 分段），同一会议的读改写在线程池中依次执行"""
+        return self._meeting_locks[hash(meeting_id) % len(self._meeting_locks)]
+
+    def _reader(self) -> sqlite3.Connection:
+        """当前线程的只读连接"""
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA query_only = ON")
+            self._readers.conn = conn
+        return conn
+
+    def _read_meeting(self, meeting_id: str, include_transcript: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        读取会议（不合并未落盘的转写；调用方持有会议锁，几次查询之间不会有写入）
+        include_transcript 为 False 时只读取会议 JSON，不读取转写和片段
+        """
+        conn = self._reader()
+        row = conn.execute("SELECT payload FROM meetings WHERE id = ?", (meeting_id,)).fetchone()
+        if not row:
+            return None
+        meeting = orjson.loads(row[0])
+        if not include_transcript:
+            return meeting
+
+        meeting["transcript_parts"] = [
+            text for text, in conn.execute(
+                "SELECT text FROM meeting_transcript WHERE meeting_id = ? ORDER BY id", (meeting_id,)
+            )
+        ]
+        segments = conn.execute(
+            "SELECT segment FROM meeting_segments WHERE meeting_id = ? ORDER BY seq", (meeting_id,)
+        ).fetchall()
+        # 片段已是序列化好的 JSON，拼成数组后一次解析
+        meeting["transcript_segments"] = orjson.loads(b"[" + b",".join(seg for seg, in segments) + b"]")
+        return meeting
+
+    def _save_meeting(self, meeting: Dict[str, Any], summary_changed: bool = False,
+                      segments_from: Optional[int] = 0, transcript_from: Optional[int] = 0) -> None:
+        """在一个事务中写入会议及其片段、转写、总结行"""
+        with self._db_lock, self._db:
+            self._write_rows(self._db, meeting, summary_changed, segments_from, transcript_from)
+
+    def _cache_session(self, meeting: Dict[str, Any]) -> None:
+        """缓存会议：进行中的放入会话缓存，已结束的放入最近读取缓存"""
+        meeting_id = meeting["id"]
+        if meeting.get("status") == "active":
+            cache, other, limit = self._sessions, self._recent, self.ACTIVE_SESSION_LIMIT
+        else:
+            cache, other, limit = self._recent, self._sessions, self.RECENT_MEETING_LIMIT
+        with self._cache_lock:
+            other.pop(meeting_id, None)
+            cache[meeting_id] = meeting
+            cache.move_to_end(meeting_id)
+            while len(cache) > limit:
+                cache.popitem(last=False)
+
+    def _evict(self, meeting_id: str) -> Optional[Dict[str, Any]]:
+        """移出缓存中的会议，返回被移出的副本"""
+        with self._cache_lock:
+            meeting = self._sessions.pop(meeting_id, None)
+            recent = self._recent.pop(meeting_id, None)
+        return meeting if meeting is not None else recent
+
+    def _load_meeting(self, meeting_id: str) -> Optional[Dict[str, Any]]:
+        """优先取内存中的会议，未命中再读库"""
+        with self._cache_lock:
+            meeting = self._sessions.get(meeting_id)
+            if meeting is None:
+                meeting = self._recent.get(meeting_id)
+                if meeting is not None:
+                    self._recent.move_to_end(meeting_id)
+        if meeting is None:
+            meeting = self._read_meeting(meeting_id)
+            if meeting is not None:
+                self._cache_session(meeting)
+        return meeting
+
+    @staticmethod
+    def _update_duration(meeting: Dict[str, Any]) -> None:
+        """按最后一个片段重新计算 duration"""
+        if meeting["transcript_segments"]:
+            last_segment = meeting["transcript_segments"][-1]
+            meeting["duration"] = int(last_segment.get("end_time", 0))
+
+    def _modify_meeting(self, meeting_id: str,
+                        pending: List[Tuple[str, Optional[Dict[str, Any]]]],
+                        mutate: Optional[Callable[[Dict[str, Any]], None]] = None,
+                        summary_changed: bool = False,
+                        snapshot: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        读改写会议（在线程池中执行）
+        先合并排队中的转写，再执行 mutate；两者都没有时只读取
+        snapshot 为 False 时不生成返回结果（只落盘排队转写时不必拼接整段转写）
+        """
+        meeting = self._load_meeting(meeting_id)
+        if not meeting or (not pending and mutate is None):
+            return self._snapshot(meeting) if meeting and snapshot else None
+
+        segments = meeting["transcript_segments"]
+        parts = meeting["transcript_parts"]
+        persisted_segments = len(segments)
+        persisted_parts = len(parts)
+        try:
+            if pending:
+                # 本批转写作为一个分段追加（与逐条拼接到整段 transcript 的结果一致：非空时以换行分隔）
+                has_text = bool(parts)
+                added = []
+                for text, segment in pending:
+                    if has_text:
+                        added.append("\n" + text)
+                    elif text:
+                        added.append(text)
+                        has_text = True
+
+                    # 保存片段，duration 直接取新片段的结束时间
+                    if segment:
+                        segments.append(segment)
+                        meeting["duration"] = int(segment.get("end_time", 0))
+                if added:
+                    parts.append("".join(added))
+
+            if mutate is not None:
+                mutate(meeting)
+                self._update_duration(meeting)
+
+            meeting["updated_at"] = datetime.now().isoformat()
+            if meeting["transcript_segments"] is not segments:
+                # mutate 整体替换了片段列表
+                segments_from = 0
+            elif len(segments) > persisted_segments:
+                segments_from = persisted_segments
+            else:
+                segments_from = None
+            transcript_from = persisted_parts if len(parts) > persisted_parts else None
+            self._save_meeting(meeting, summary_changed=summary_changed,
+                               segments_from=segments_from, transcript_from=transcript_from)
+        except Exception:
+            # 内存副本可能已与库中不一致，下次重新读取
+            self._evict(meeting_id)
+            raise
+
+        self._cache_session(meeting)
+        return self._snapshot(meeting) if snapshot else None
+
+    def _take_pending(self, meeting_id: str) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+        """取出该会议排队中的转写，并取消其延迟写入任务"""
+        items = self._pending_transcripts.pop(meeting_id, None)
+        self._pending_chars.pop(meeting_id, None)
+        task = self._flush_tasks.pop(meeting_id, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        return items or []
+
+    async def _modify(self, meeting_id: str, extra: Optional[List[Tuple[str, Optional[Dict[str, Any]]]]] = None,
+                      mutate: Optional[Callable[[Dict[str, Any]], None]] = None,
+                      summary_changed: bool = False,
+                      snapshot: bool = True) -> Optional[Dict[str, Any]]:
+        """持有会议锁，把排队转写和本次修改一起在线程池中落盘"""
+        async with self._lock_for(meeting_id):
+            pending = self._take_pending(meeting_id)
+            if extra:
+                pending.extend(extra)
+            return await run_in_threadpool(
+                self._modify_meeting, meeting_id, pending, mutate, summary_changed, snapshot
+            )
 
     async def create_meeting(self, name: str, mode: str = "2pass",
                              user_id: str = None,
                              hotwords: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
         """创建新会议"""
         meeting_id = str(uuid4())
+        now = datetime.now().isoformat()
 
         meeting = {
             "id": meeting_id,
@@ -34,197 +380,256 @@ class MeetingService:
             "name": name,
             "mode": mode,
             "status": "active",
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat(),
+            "created_at": now,
+            "updated_at": now,
             "duration": 0,
             "hotwords": hotwords or {},
-            "transcript": "",
+            "transcript_parts": [],
             "transcript_segments": [],
             "summary": None,
             "audio_chunks": []
         }
 
-        # 保存到文件
-        meeting_path = self._get_meeting_path(meeting_id)
-        with open(meeting_path, 'w', encoding='utf-8') as f:
-            json.dump(meeting, f, ensure_ascii=False, indent=2)
+        await run_in_threadpool(self._save_meeting, meeting)
+        self._cache_session(meeting)
 
-        return meeting
+        return self._snapshot(meeting)
 
     async def get_meeting(self, meeting_id: str) -> Optional[Dict[str, Any]]:
-        """获取会议详情"""
-        meeting_path = self._get_meeting_path(meeting_id)
+        """获取会议详情（先写入该会议排队中的转写，保证读到最新内容）"""
+        return await self._modify(meeting_id)
 
-        if not meeting_path.exists():
-            return None
+    async def meeting_exists(self, meeting_id: str) -> bool:
+        """会议是否存在（只查主键）"""
+        rows = await run_in_threadpool(self._query, "SELECT 1 FROM meetings WHERE id = ?", [meeting_id])
+        return bool(rows)
 
-        with open(meeting_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+    async def get_updated_at(self, meeting_id: str) -> Optional[str]:
+        """会议最后修改时间（只查列，不解析会议 JSON，用于 ETag；会议不存在返回 None）"""
+        if meeting_id in self._pending_transcripts:
+            await self.flush_transcript(meeting_id)
+        rows = await run_in_threadpool(self._query, "SELECT updated_at FROM meetings WHERE id = ?", [meeting_id])
+        return rows[0][0] if rows else None
+
+    def _query(self, sql: str, params: list) -> list:
+        return self._reader().execute(sql, params).fetchall()
 
     async def list_meetings(self, limit: int = 20, offset: int = 0, user_id: str = None) -> List[Dict[str, Any]]:
-        """获取会议列表"""
-        meetings = []
-
-        if self.data_dir.exists():
-            for path in sorted(self.data_dir.glob('*.json'), key=lambda p: p.stat().st_mtime, reverse=True):
-                with open(path, 'r', encoding='utf-8') as f:
-                    meeting = json.load(f)
-
-                    # 用户数据隔离：过滤非该用户的会议
-                    if user_id and meeting.get('user_id') != user_id:
-                        continue
-
-                    # 简化为列表项
-                    meetings.append({
-                        "id": meeting["id"],
-                        "name": meeting["name"],
-                        "mode": meeting["mode"],
-                        "status": meeting["status"],
-                        "created_at": meeting["created_at"],
-                        "duration": meeting.get("duration", 0)
-                    })
-
-        return meetings[offset:offset + limit]
+        """获取会议列表（只查列表字段，走 (user_id, updated_at) 索引，不解析会议 JSON）"""
+        sql = "SELECT id, name, mode, status, created_at, duration FROM meetings"
+        params: list = []
+        # 用户数据隔离：过滤非该用户的会议
+        if user_id:
+            sql += " WHERE user_id = ?"
+            params.append(user_id)
+        sql += " ORDER BY updated_at DESC LIMIT ? OFFSET ?"
+        params.extend((limit, offset))
+
+        rows = await run_in_threadpool(self._query, sql, params)
+
+        return [
+            {
+                "id": meeting_id,
+                "name": name,
+                "mode": mode,
+                "status": status,
+                "created_at": created_at,
+                "duration": duration
+            }
+            for meeting_id, name, mode, status, created_at, duration in rows
+        ]
 
     async def update_transcript(self, meeting_id: str, text: str,
                                  segment: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
-        """更新会议 transcript"""
-        meeting = await self.get_meeting(meeting_id)
-        if not meeting:
-            return None
-
-        # 追加到现有 transcript
-        if meeting["transcript"]:
-            meeting["transcript"] += "\n" + text
-        else:
-            meeting["transcript"] = text
-
-        # 保存片段
-        if segment:
-            meeting["transcript_segments"].append(segment)
-
-        meeting["updated_at"] = datetime.now().isoformat()
-
-        # 重新计算duration
-        if meeting["transcript_segments"]:
-            last_segment = meeting["transcript_segments"][-1]
-            meeting["duration"] = int(last_segment.get("end_time", 0))
-
-        # 保存
-        meeting_path = self._get_meeting_path(meeting_id)
-        with open(meeting_path, 'w', encoding='utf-8') as f:
-            json.dump(meeting, f, ensure_ascii=False, indent=2)
-
-        return meeting
+        """更新会议 transcript（立即写入）"""
+        return await self._modify(meeting_id, extra=[(text, segment)])
+
+    async def append_transcript(self, meeting_id: str, text: str,
+                                segment: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        追加转写（排队合并写入）
+        同一会议在 TRANSCRIPT_FLUSH_DELAY 秒内的多次追加合并为一次写入，
+        排队内容超过 TRANSCRIPT_FLUSH_CHARS 时不等延迟立即写入
+        """
+        pending = self._pending_transcripts.get(meeting_id)
+        # 已有排队或内存中的进行中会议无需再查库确认存在
+        check_exists = pending is None and meeting_id not in self._sessions
+        if pending is None:
+            # 先建立排队再查库，查库期间同一会议的其他追加按到达顺序排在后面
+            pending = self._pending_transcripts[meeting_id] = []
+            self._flush_tasks[meeting_id] = asyncio.create_task(self._delayed_flush(meeting_id))
+        pending.append((text, segment))
+        if check_exists and not await self.meeting_exists(meeting_id):
+            if self._pending_transcripts.get(meeting_id) is pending:
+                self._take_pending(meeting_id)
+            return False
+
+        chars = self._pending_chars.get(meeting_id, 0) + len(text)
+        self._pending_chars[meeting_id] = chars
+        if chars >= self.TRANSCRIPT_FLUSH_CHARS:
+            task = self._flush_tasks.get(meeting_id)
+            if task is not None and not task.done():
+                task.cancel()
+            self._pending_chars[meeting_id] = 0
+            self._flush_tasks[meeting_id] = asyncio.create_task(self.flush_transcript(meeting_id))
+        return True
+
+    async def _delayed_flush(self, meeting_id: str) -> None:
+        await asyncio.sleep(self.TRANSCRIPT_FLUSH_DELAY)
+        await self.flush_transcript(meeting_id)
+
+    async def flush_transcript(self, meeting_id: str) -> None:
+        """立即写入该会议排队中的转写"""
+        if meeting_id in self._pending_transcripts:
+            await self._modify(meeting_id, snapshot=False)
+
+    async def flush_all_transcripts(self) -> None:
+        """写入所有排队中的转写（服务关闭时调用）"""
+        for meeting_id in list(self._pending_transcripts):
+            await self.flush_transcript(meeting_id)
 
     async def end_meeting(self, meeting_id: str) -> Optional[Dict[str, Any]]:
         """结束会议"""
-        meeting = await self.get_meeting(meeting_id)
-        if not meeting:
-            return None
-
-        meeting["status"] = "completed"
-        meeting["updated_at"] = datetime.now().isoformat()
-
-        # 计算最终duration
-        if meeting["transcript_segments"]:
-            last_segment = meeting["transcript_segments"][-1]
-            meeting["duration"] = int(last_segment.get("end_time", 0))
-
-        # 保存
-        meeting_path = self._get_meeting_path(meeting_id)
-        with open(meeting_path, 'w', encoding='utf-8') as f:
-            json.dump(meeting, f, ensure_ascii=False, indent=2)
-
-        return meeting
+        def mutate(meeting: Dict[str, Any]) -> None:
+            meeting["status"] = "completed"
+
+        return await self._modify(meeting_id, mutate=mutate)
+
+    def _delete_meeting_rows(self, meeting_id: str) -> bool:
+        with self._db_lock, self._db:
+            row = self._db.execute("SELECT rowid FROM meetings WHERE id = ?", (meeting_id,)).fetchone()
+            if row is None:
+                return False
+            self._db.execute("DELETE FROM meetings WHERE rowid = ?", row)
+            self._delete_transcript_rows(self._db, meeting_id)
+            self._db.execute("DELETE FROM meeting_summaries WHERE meeting_id = ?", (meeting_id,))
+            self._db.execute("DELETE FROM meeting_segments WHERE meeting_id = ?", (meeting_id,))
+        return True
 
     async def delete_meeting(self, meeting_id: str) -> bool:
         """删除会议"""
-        meeting_path = self._get_meeting_path(meeting_id)
-
-        if meeting_path.exists():
-            meeting_path.unlink()
-            return True
-
-        return False
+        async with self._lock_for(meeting_id):
+            # 丢弃排队中的转写
+            self._take_pending(meeting_id)
+            self._evict(meeting_id)
+            return await run_in_threadpool(self._delete_meeting_rows, meeting_id)
 
     async def save_summary(self, meeting_id: str, summary: str,
                            key_points: List[str] = None,
                            todos: List[Dict[str, str]] = None,
                            decisions: List[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
         """保存会议总结"""
-        meeting = await self.get_meeting(meeting_id)
-        if not meeting:
+        def mutate(meeting: Dict[str, Any]) -> None:
+            meeting["summary"] = {
+                "content": summary,
+                "key_points": key_points or [],
+                "todos": todos or [],
+                "decisions": decisions or [],
+                "generated_at": datetime.now().isoformat()
+            }
+
+        return await self._modify(meeting_id, mutate=mutate, summary_changed=True)
+
+    async def get_summary_payload(self, meeting_id: str) -> Optional[Tuple[bytes, str]]:
+        """
+        获取会议总结的 JSON 字节和会议最后修改时间
+        会议不存在返回 None，尚无总结时 JSON 为 b"null"
+        """
+        rows = await run_in_threadpool(
+            self._query,
+            "SELECT s.payload, m.updated_at FROM meetings m "
+            "LEFT JOIN meeting_summaries s ON s.meeting_id = m.id WHERE m.id = ?",
+            [meeting_id]
+        )
+        if not rows:
             return None
-
-        meeting["summary"] = {
-            "content": summary,
-            "key_points": key_points or [],
-            "todos": todos or [],
-            "decisions": decisions or [],
-            "generated_at": datetime.now().isoformat()
-        }
-        meeting["updated_at"] = datetime.now().isoformat()
-
-        # 保存
-        meeting_path = self._get_meeting_path(meeting_id)
-        with open(meeting_path, 'w', encoding='utf-8') as f:
-            json.dump(meeting, f, ensure_ascii=False, indent=2)
-
-        return meeting
+        payload, updated_at = rows[0]
+        return payload or b"null", updated_at
+
+    def _transcript_preview(self, conn: sqlite3.Connection, meeting_id: str) -> Tuple[str, bool]:
+        """转写开头的摘要，只读取够长度的分段；返回 (摘要, 是否被截断)"""
+        limit = self.SEARCH_PREVIEW_CHARS
+        parts: List[str] = []
+        size = 0
+        cursor = conn.execute("SELECT text FROM meeting_transcript WHERE meeting_id = ? ORDER BY id", (meeting_id,))
+        for text, in cursor:
+            parts.append(text)
+            size += len(text)
+            if size > limit:
+                break
+        cursor.close()
+        return "".join(parts)[:limit], size > limit
+
+    def _search(self, query: str, limit: int, user_id: Optional[str]) -> list:
+        """在转写分段中检索，返回命中会议的 (id, name, created_at, 摘要, 是否截断)"""
+        if len(query) >= 3:
+            # trigram 索引要求至少3个字符，整个查询作为短语匹配
+            sql = (
+                "SELECT id, name, created_at FROM meetings WHERE id IN ("
+                "SELECT t.meeting_id FROM transcript_fts f JOIN meeting_transcript t ON t.id = f.rowid "
+                "WHERE transcript_fts MATCH ?)"
+            )
+            params: list = ['"' + query.replace('"', '""') + '"']
+        else:
+            # 短查询只能逐行匹配：先按 user_id 索引取出该用户的会议，只扫描这些会议的转写分段
+            escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            sql = (
+                "SELECT id, name, created_at FROM meetings m WHERE EXISTS ("
+                "SELECT 1 FROM meeting_transcript t WHERE t.meeting_id = m.id AND t.text LIKE ? ESCAPE '\\')"
+            )
+            params = [f"%{escaped}%"]
+        if user_id:
+            sql += " AND user_id = ?"
+            params.append(user_id)
+        sql += " LIMIT ?"
+        params.append(limit)
+
+        conn = self._reader()
+        return [
+            (meeting_id, name, created_at, *self._transcript_preview(conn, meeting_id))
+            for meeting_id, name, created_at in conn.execute(sql, params).fetchall()
+        ]
 
     async def search_transcripts(self, query: str, limit: int = 10, user_id: str = None) -> List[Dict[str, Any]]:
-        """搜索会议记录"""
-        results = []
-
-        if self.data_dir.exists():
-            for path in self.data_dir.glob('*.json'):
-                with open(path, 'r', encoding='utf-8') as f:
-                    meeting = json.load(f)
-
-                    # 用户数据隔离
-                    if user_id and meeting.get('user_id') != user_id:
-                        continue
-
-                    transcript = meeting.get("transcript", "")
-
-                    if query.lower() in transcript.lower():
-                        results.append({
-                            "id": meeting["id"],
-                            "name": meeting["name"],
-                            "created_at": meeting["created_at"],
-                            "matched_text": transcript[:200] + "..." if len(transcript) > 200 else transcript
-                        })
-
-        return results[:limit]
+        """搜索会议记录（走 FTS5 索引）"""
+        rows = await run_in_threadpool(self._search, query, limit, user_id)
+
+        return [
+            {
+                "id": meeting_id,
+                "name": name,
+                "created_at": created_at,
+                "matched_text": text + "..." if truncated else text
+            }
+            for meeting_id, name, created_at, text, truncated in rows
+        ]
 
     async def save_offline_result(self, meeting_id: str, result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """保存离线识别结果"""
-        meeting = await self.get_meeting(meeting_id)
-        if not meeting:
-            return None
-
         # 解析结果
         full_text = result.get('full_text', '')
         segments = result.get('segments', [])
 
-        # 更新会议数据
-        meeting["transcript"] = full_text
+        async with self._lock_for(meeting_id):
+            # 离线结果整体替换转写，排队中的实时转写不再需要
+            self._take_pending(meeting_id)
+            return await run_in_threadpool(self._replace_transcript, meeting_id, full_text, segments)
+
+    def _replace_transcript(self, meeting_id: str, full_text: str,
+                            segments: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """整体替换转写并结束会议（在线程池中执行），不读取即将被覆盖的旧转写和片段"""
+        meeting = self._evict(meeting_id) or self._read_meeting(meeting_id, include_transcript=False)
+        if meeting is None:
+            return None
+
+        meeting["transcript_parts"] = [full_text] if full_text else []
         meeting["transcript_segments"] = segments
         meeting["status"] = "completed"
+        self._update_duration(meeting)
         meeting["updated_at"] = datetime.now().isoformat()
-
-        # 计算duration
-        if segments:
-            last_segment = segments[-1]
-            meeting["duration"] = int(last_segment.get("end_time", 0))
-
-        # 保存
-        meeting_path = self._get_meeting_path(meeting_id)
-        with open(meeting_path, 'w', encoding='utf-8') as f:
-            json.dump(meeting, f, ensure_ascii=False, indent=2)
-
-        return meeting
+        self._save_meeting(meeting, segments_from=0, transcript_from=0)
+        self._cache_session(meeting)
+        return self._snapshot(meeting)
 
 
 # 全局服务实例